@@ -0,0 +1,218 @@
+import argparse
+import concurrent.futures
+import functools
+import hashlib
+import json
+import os
+import pathlib
+
+import model
+import texture
+
+import numpy
+import PIL.Image
+
+CACHE_PATH = "analysis.json"
+
+# (x0, y0, x1, y1) texels only the classic arms cover, empty on slim skins
+CLASSIC_ONLY = (
+    (50, 16, 52, 20),
+    (54, 20, 56, 32),
+    (42, 48, 44, 52),
+    (46, 52, 48, 64),
+)
+
+
+def valid_size(width: int, height: int) -> bool:
+    return width >= 64 and width % 64 == 0 and height in (width, width // 2)
+
+
+@functools.cache
+def classic_only_mask(scale: int) -> numpy.ndarray:
+    mask = numpy.zeros((64 * scale, 64 * scale), bool)
+    for x0, y0, x1, y1 in CLASSIC_ONLY:
+        mask[y0 * scale : y1 * scale, x0 * scale : x1 * scale] = True
+
+    mask.flags.writeable = False
+    return mask
+
+
+@functools.cache
+def uv_mask(
+    slim: bool, scale: int, layer: str = None, name: str = None
+) -> numpy.ndarray:
+    # every texel the faces of the matching skin parts sample, layer is "base"
+    # or "overlays" and name a part such as "hat", None matches all of them
+    size = 64 * scale
+    mask = numpy.zeros((size, size), bool)
+    for part_layer, part_name, box in model.get_model(slim).parts:
+        if part_layer == "cape" or layer not in (None, part_layer):
+            continue
+
+        if name not in (None, part_name):
+            continue
+
+        for face in range(0, len(box.array), 4):
+            uv = numpy.round(box.array[face : face + 4, :2] * size).astype(int)
+            (x0, y0), (x1, y1) = uv.min(axis=0), uv.max(axis=0)
+            mask[y0:y1, x0:x1] = True
+
+    mask.flags.writeable = False
+    return mask
+
+
+def base_mask(slim: bool, scale: int) -> numpy.ndarray:
+    # every texel a base layer face samples, these should be opaque
+    return uv_mask(slim, scale, "base")
+
+
+def analyze_batch(pixels: numpy.ndarray) -> list:
+    # (N, height, width, 4) skins of one size analysed together
+    height, width = pixels.shape[1:3]
+    if not valid_size(width, height):
+        return [
+            {"width": width, "height": height, "valid": False, "slim": False}
+        ] * len(pixels)
+
+    pixels = texture.convert_legacy(pixels)
+    scale = width // 64
+    alpha = pixels[..., 3].reshape(len(pixels), -1)
+
+    # slim arms leave the outer arm columns empty, a majority vote tolerates
+    # stray texels some skins carry there
+    slim = (alpha[:, classic_only_mask(scale).ravel()] > 0).mean(axis=1) < 0.5
+
+    # holes in the base layer show the background through the model
+    holes = alpha < 255
+    transparent = numpy.where(
+        slim,
+        holes[:, base_mask(True, scale).ravel()].sum(axis=1),
+        holes[:, base_mask(False, scale).ravel()].sum(axis=1),
+    )
+
+    return [
+        {
+            "width": width,
+            "height": height,
+            "valid": True,
+            "slim": bool(s),
+            "transparent": int(t),
+        }
+        for s, t in zip(slim, transparent)
+    ]
+
+
+def analyze(pixels: numpy.ndarray) -> dict:
+    return analyze_batch(pixels[None])[0]
+
+
+def analyze_image(img: PIL.Image.Image) -> dict:
+    try:
+        return analyze(numpy.asarray(img.convert("RGBA"), numpy.uint8))
+
+    finally:
+        img.close()
+
+
+def analyze_chunk(paths: list) -> list:
+    # decode a chunk of files and analyse each group of equal sizes at once
+    results = [None] * len(paths)
+    groups = {}
+    for i, path in enumerate(paths):
+        try:
+            with PIL.Image.open(path) as img:
+                pixels = numpy.asarray(img.convert("RGBA"), numpy.uint8)
+
+        except (OSError, ValueError):
+            results[i] = {"width": 0, "height": 0, "valid": False, "slim": False}
+            continue
+
+        groups.setdefault(pixels.shape, []).append((i, pixels))
+
+    for group in groups.values():
+        indices, batch = zip(*group)
+        for i, result in zip(indices, analyze_batch(numpy.stack(batch))):
+            results[i] = result
+
+    return results
+
+
+def content_hash(path: str) -> str:
+    with open(path, "rb") as fp:
+        return hashlib.blake2b(fp.read(), digest_size=16).hexdigest()
+
+
+def load_cache(path: str) -> dict:
+    try:
+        with open(path, "r") as fp:
+            return json.load(fp)
+
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path: str, cache: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fp:
+        json.dump(cache, fp)
+
+    os.replace(tmp, path)
+
+
+def analyze_files(
+    paths: list, cache_path: str = CACHE_PATH, processes: int = None
+) -> dict:
+    # results keyed by path, files seen before are looked up by content hash
+    cache = {} if cache_path is None else load_cache(cache_path)
+    hashes = {str(path): content_hash(path) for path in paths}
+    missing = {}
+    for path, digest in hashes.items():
+        if digest not in cache:
+            missing.setdefault(digest, path)
+
+    if missing:
+        digests = list(missing)
+        paths = [missing[digest] for digest in digests]
+        workers = processes or os.cpu_count() or 1
+        size = max(1, min(256, len(paths) // (4 * workers)))
+        chunks = [paths[i : i + size] for i in range(0, len(paths), size)]
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            results = [
+                r for chunk in executor.map(analyze_chunk, chunks) for r in chunk
+            ]
+
+        cache.update(zip(digests, results))
+        if cache_path is not None:
+            save_cache(cache_path, cache)
+
+    return {path: cache[digest] for path, digest in hashes.items()}
+
+
+def analyze_directory(
+    directory: str, cache_path: str = CACHE_PATH, processes: int = None
+) -> dict:
+    paths = sorted(pathlib.Path(directory).rglob("*.png"))
+    return analyze_files(paths, cache_path, processes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify and validate skins")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("-c", "--cache", default=CACHE_PATH)
+    parser.add_argument("-j", "--processes", type=int)
+    args = parser.parse_args()
+
+    paths = []
+    for path in map(pathlib.Path, args.paths):
+        paths += sorted(path.rglob("*.png")) if path.is_dir() else [path]
+
+    for path, result in analyze_files(paths, args.cache, args.processes).items():
+        if not result["valid"]:
+            print(f"{path}: invalid size {result['width']}x{result['height']}")
+
+        else:
+            arms = "slim" if result["slim"] else "classic"
+            holes = f", {result['transparent']} transparent" * bool(
+                result["transparent"]
+            )
+            print(f"{path}: {arms}{holes}")
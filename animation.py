@@ -0,0 +1,130 @@
+import math
+
+import model
+
+import numpy
+
+# samples per animation cycle, poses in between are interpolated
+FRAMES = 64
+
+# delay between animated frames in milliseconds
+FRAME_TIME = 16
+
+
+def keyframes(curves: dict) -> dict:
+    # sample (x, y, z) rotation curves of a cycle phase into per part tables
+    phase = numpy.arange(FRAMES) / FRAMES * 2 * math.pi
+    tables = {}
+    for name, curve in curves.items():
+        tables[name] = numpy.stack(
+            numpy.broadcast_arrays(*curve(phase)), axis=-1
+        ).astype(numpy.float32)
+
+    return tables
+
+
+# rotations in degrees around each part's joint, cycles last PERIODS seconds
+ANIMATIONS = {
+    "walk": keyframes(
+        {
+            "right-sleeve": lambda p: (40 * numpy.sin(p), 0, 0),
+            "left-sleeve": lambda p: (-40 * numpy.sin(p), 0, 0),
+            "right-pants": lambda p: (-40 * numpy.sin(p), 0, 0),
+            "left-pants": lambda p: (40 * numpy.sin(p), 0, 0),
+            "cape": lambda p: (20 + 4 * numpy.sin(2 * p), 0, 0),
+        }
+    ),
+    "idle": keyframes(
+        {
+            "right-sleeve": lambda p: (3 * numpy.sin(p), 0, 3 + 3 * numpy.cos(p)),
+            "left-sleeve": lambda p: (-3 * numpy.sin(p), 0, -3 - 3 * numpy.cos(p)),
+            "cape": lambda p: (4 + 2 * numpy.sin(p), 0, 0),
+        }
+    ),
+}
+
+PERIODS = {"walk": 1.2, "idle": 4}
+
+
+class Animator:
+    def __init__(self, name: str, speed: float = 1) -> None:
+        self.name = name
+        self.speed = speed
+        self.period = PERIODS[name]
+        self.tables = {}
+
+    def table(self, parts: model.Model) -> numpy.ndarray:
+        # (FRAMES, parts, 3) rotations in the model's part order, overlays
+        # follow the base part they cover
+        if parts not in self.tables:
+            curves = ANIMATIONS[self.name]
+            table = numpy.zeros((FRAMES, len(parts.parts), 3), numpy.float32)
+            for index, (_, name, _) in enumerate(parts.parts):
+                if name in curves:
+                    table[:, index] = curves[name]
+
+            self.tables[parts] = table
+
+        return self.tables[parts]
+
+    def sample(self, parts: model.Model, time: float) -> numpy.ndarray:
+        table = self.table(parts)
+        position = time * self.speed / self.period % 1 * FRAMES
+        frame = int(position)
+        weight = position - frame
+        return (1 - weight) * table[frame] + weight * table[(frame + 1) % FRAMES]
+
+    def matrices(
+        self, parts: model.Model, exploded: bool, time: float
+    ) -> numpy.ndarray:
+        # every part's rest matrix rotated around its joint in one batch
+        angles = numpy.radians(self.sample(parts, time))
+        joints = joint_positions(parts, exploded)
+        c = numpy.cos(angles)
+        s = numpy.sin(angles)
+
+        rotation = numpy.zeros((len(angles), 4, 4), numpy.float32)
+        rotation[:, 3, 3] = 1
+
+        # rz @ ry @ rx, the same order Box.matrix applies its rest rotation
+        cx, cy, cz = c.T
+        sx, sy, sz = s.T
+        rotation[:, 0, 0] = cz * cy
+        rotation[:, 0, 1] = cz * sy * sx - sz * cx
+        rotation[:, 0, 2] = cz * sy * cx + sz * sx
+        rotation[:, 1, 0] = sz * cy
+        rotation[:, 1, 1] = sz * sy * sx + cz * cx
+        rotation[:, 1, 2] = sz * sy * cx - cz * sx
+        rotation[:, 2, 0] = -sy
+        rotation[:, 2, 1] = cy * sx
+        rotation[:, 2, 2] = cy * cx
+
+        # rotate about the joint: t(joint) @ r @ t(-joint)
+        rotation[:, :3, 3] = joints - numpy.einsum(
+            "pij,pj->pi", rotation[:, :3, :3], joints
+        )
+        return rotation @ parts.part_matrices(exploded)
+
+
+JOINTS = {}
+
+
+def joint_positions(parts: model.Model, exploded: bool) -> numpy.ndarray:
+    # pivots move with their part when the model is exploded
+    key = parts, bool(exploded)
+    if key not in JOINTS:
+        joints = []
+        for _, _, box in parts.parts:
+            joint = numpy.array([box.piv_x, box.piv_y, box.piv_z], numpy.float32)
+            if exploded:
+                joint += (
+                    box.exp_x - box.pos_x,
+                    box.exp_y - box.pos_y,
+                    box.exp_z - box.pos_z,
+                )
+
+            joints.append(joint)
+
+        JOINTS[key] = numpy.array(joints)
+
+    return JOINTS[key]
@@ -0,0 +1,48 @@
+import argparse
+import random
+import time
+
+import text
+
+CODES = list(text.COLORS) + list(text.FORMATS) + ["x", "§"]
+WORDS = ["the", "server", "joined", "left", "§", "minigames", "welcome", "!"]
+
+
+def generate(size: int, seed: int = 0) -> str:
+    # log or motd like text of about size characters, roughly one code in
+    # every three words including unknown codes and stray §
+    rng = random.Random(seed)
+    pieces = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.3:
+            piece = "§" + rng.choice(CODES)
+
+        else:
+            piece = rng.choice(WORDS) + rng.choice(" \n")
+
+        pieces.append(piece)
+        length += len(piece)
+
+    return "".join(pieces)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time Text.parse on large inputs")
+    parser.add_argument("sizes", nargs="*", type=float, default=[1, 2, 4, 8])
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for megabytes in args.sizes:
+        source = generate(int(megabytes * 1024 * 1024), args.seed)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            segments = text.Text.parse(source)
+            best = min(best, time.perf_counter() - start)
+
+        print(
+            f"{megabytes:g} MB: {len(segments)} segments in {best:.3f}s"
+            f" ({megabytes / best:.1f} MB/s)"
+        )
@@ -0,0 +1,132 @@
+import transform
+
+import numpy
+
+
+class Camera:
+    def __init__(
+        self,
+        rot_x: float = 0,
+        rot_y: float = 0,
+        zoom: float = 1,
+        x_off: float = 0,
+        y_off: float = 0,
+        ortho: bool = False,
+        width: int = 1,
+        height: int = 1,
+    ) -> None:
+        self.rot_x = rot_x
+        self.rot_y = rot_y
+        self.zoom = zoom
+        self.x_off = x_off
+        self.y_off = y_off
+        self.ortho = bool(ortho)
+        self.width = max(1, width)
+        self.height = max(1, height)
+
+        # matrices are rebuilt lazily after the inputs they depend on change
+        self.cache = {}
+
+    @property
+    def state(self) -> dict:
+        # keyword arguments that rebuild this camera, sizes excluded
+        return {
+            "rot_x": self.rot_x,
+            "rot_y": self.rot_y,
+            "zoom": self.zoom,
+            "x_off": self.x_off,
+            "y_off": self.y_off,
+            "ortho": self.ortho,
+        }
+
+    def invalidate(self, *names: str) -> None:
+        for name in names:
+            self.cache.pop(name, None)
+
+        self.cache.pop("inverse", None)
+
+    def rotate(self, x: float, y: float) -> None:
+        self.rot_x = min(90, max(self.rot_x + x, -90))  # clamp x rotation
+        self.rot_y += y
+        self.invalidate("orbit", "view")
+
+    def zoom_by(self, amount: float) -> None:
+        self.zoom = min(5, max(0.25, self.zoom + amount))
+        self.invalidate("view")
+
+    def pan(self, x: float, y: float) -> None:
+        self.x_off += x
+        self.y_off += y
+        self.invalidate("view")
+
+    def set_ortho(self, ortho: bool) -> None:
+        if bool(ortho) != self.ortho:
+            self.ortho = bool(ortho)
+            self.invalidate("projection")
+
+    def resize(self, width: int, height: int) -> None:
+        width, height = max(1, width), max(1, height)
+        if (width, height) != (self.width, self.height):
+            self.width = width
+            self.height = height
+            self.invalidate("projection")
+
+    @property
+    def orbit(self) -> numpy.ndarray:
+        # model centred on the origin and turned towards the camera
+        if "orbit" not in self.cache:
+            self.cache["orbit"] = (
+                transform.rotate(self.rot_x, 1, 0, 0)
+                @ transform.rotate(self.rot_y, 0, 1, 0)
+                @ transform.translate(0, -18, 0)
+            )
+
+        return self.cache["orbit"]
+
+    @property
+    def view(self) -> numpy.ndarray:
+        if "view" not in self.cache:
+            self.cache["view"] = (
+                transform.translate(self.y_off, -self.x_off, -50)
+                @ transform.scale(self.zoom, self.zoom, self.zoom)
+                @ self.orbit
+            )
+
+        return self.cache["view"]
+
+    @property
+    def projection(self) -> numpy.ndarray:
+        if "projection" not in self.cache:
+            if self.ortho:
+                self.cache["projection"] = transform.ortho(
+                    -self.width / 15,
+                    self.width / 15,
+                    -self.height / 15,
+                    self.height / 15,
+                    -100,
+                    250,
+                )
+
+            else:
+                self.cache["projection"] = transform.perspective(
+                    60, self.width / self.height, 0.1, 250
+                )
+
+        return self.cache["projection"]
+
+    @property
+    def inverse(self) -> numpy.ndarray:
+        if "inverse" not in self.cache:
+            self.cache["inverse"] = numpy.linalg.inv(self.projection @ self.view)
+
+        return self.cache["inverse"]
+
+    def ray(self, x: int, y: int) -> tuple:
+        # model space origin and direction through a window position
+        x = 2 * x / self.width - 1
+        y = 1 - 2 * y / self.height
+        near = self.inverse @ numpy.array([x, y, -1, 1])
+        far = self.inverse @ numpy.array([x, y, 1, 1])
+        near = near[:3] / near[3]
+        far = far[:3] / far[3]
+        return near, far - near
@@ -1,10 +1,232 @@
-import colorsys
+import functools
 import re
 import tkinter.ttk
 
 import numpy as np
 from PIL import Image, ImageDraw, ImageTk
 
+# conversions match colorsys but take broadcast arrays of components in 0-1
+# and return them stacked on a last axis of 3, so a scalar colour comes back
+# as a (3,) array that unpacks like the colorsys tuple
+
+
+def components(*args) -> tuple:
+    return np.broadcast_arrays(*(np.asarray(x, float) for x in args))
+
+
+def hue(r: np.ndarray, g: np.ndarray, b: np.ndarray, maxc, rangec) -> np.ndarray:
+    # shared by rgb_to_hsv and rgb_to_hls, rangec is 0 where grey
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2 + rc - bc, 4 + gc - rc))
+    return np.where(rangec == 0, 0, h / 6 % 1)
+
+
+def rgb_to_hsv(r, g, b) -> np.ndarray:
+    r, g, b = components(r, g, b)
+    maxc = np.maximum(np.maximum(r, g), b)
+    rangec = maxc - np.minimum(np.minimum(r, g), b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(rangec == 0, 0, rangec / maxc)
+
+    return np.stack((hue(r, g, b, maxc, rangec), s, maxc), axis=-1)
+
+
+def hsv_to_rgb(h, s, v) -> np.ndarray:
+    h, s, v = components(h, s, v)
+    i = np.floor(h * 6)
+    f = h * 6 - i
+    p = v * (1 - s)
+    q = v * (1 - s * f)
+    t = v * (1 - s * (1 - f))
+    i = i.astype(int) % 6
+    return np.stack(
+        (
+            np.choose(i, (v, q, p, p, t, v)),
+            np.choose(i, (t, v, v, q, p, p)),
+            np.choose(i, (p, p, t, v, v, q)),
+        ),
+        axis=-1,
+    )
+
+
+def rgb_to_hls(r, g, b) -> np.ndarray:
+    r, g, b = components(r, g, b)
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(l <= 0.5, rangec / sumc, rangec / (2 - maxc - minc))
+
+    s = np.where(rangec == 0, 0, s)
+    return np.stack((hue(r, g, b, maxc, rangec), l, s), axis=-1)
+
+
+def hls_to_rgb(h, l, s) -> np.ndarray:
+    h, l, s = components(h, l, s)
+    m2 = np.where(l <= 0.5, l * (1 + s), l + s - l * s)
+    m1 = 2 * l - m2
+    channels = []
+    for offset in (1 / 3, 0, -1 / 3):
+        x = (h + offset) % 1
+        channels.append(
+            np.select(
+                (s == 0, x < 1 / 6, x < 0.5, x < 2 / 3),
+                (l, m1 + (m2 - m1) * x * 6, m2, m1 + (m2 - m1) * (2 / 3 - x) * 6),
+                m1,
+            )
+        )
+
+    return np.stack(channels, axis=-1)
+
+
+HEX_DIGITS = np.array(["%02X" % i for i in range(256)])
+
+# hex digit values by character code, -1 for anything else
+HEX_VALUES = np.full(128, -1)
+HEX_VALUES[[ord(c) for c in "0123456789"]] = range(10)
+HEX_VALUES[[ord(c) for c in "abcdef"]] = range(10, 16)
+HEX_VALUES[[ord(c) for c in "ABCDEF"]] = range(10, 16)
+
+
+def rgb_to_hex(rgb) -> np.ndarray:
+    # (..., 3) components in 0-1 to "#RRGGBB" strings
+    rgb = np.round(np.clip(np.asarray(rgb, float), 0, 1) * 255).astype(int)
+    result = np.char.add("#", HEX_DIGITS[rgb[..., 0]])
+    result = np.char.add(result, HEX_DIGITS[rgb[..., 1]])
+    return np.asarray(np.char.add(result, HEX_DIGITS[rgb[..., 2]]))[()]
+
+
+def hex_to_rgb(values) -> np.ndarray:
+    # "#RGB" or "#RRGGBB" strings, the # optional, to (..., 3) components
+    values = np.char.lstrip(np.asarray(values, str), "#")
+    lengths = np.char.str_len(values)
+    if np.any((lengths != 3) & (lengths != 6)):
+        raise ValueError("hex colours must have 3 or 6 digits")
+
+    chars = np.asarray(values, "U6")[..., None].view("U1")
+    short = lengths == 3
+    chars[short] = chars[short][..., [0, 0, 1, 1, 2, 2]]
+    codes = chars.view(np.uint32)
+    digits = HEX_VALUES[np.minimum(codes, 127)]
+    if np.any(digits < 0):
+        raise ValueError("invalid hex digit")
+
+    digits = digits.reshape(digits.shape[:-1] + (3, 2))
+    return (digits[..., 0] * 16 + digits[..., 1]) / 255
+
+
+@functools.lru_cache(maxsize=64)
+def sv_square(hue: int, width: int, height: int) -> Image.Image:
+    # saturation increases to the right and value upwards, hue in degrees
+    saturation = np.arange(width) / width
+    value = (height - np.arange(height)) / height
+    rgb = hsv_to_rgb(hue / 360, saturation[None, :], value[:, None])
+    return Image.fromarray(np.round(rgb * 255).astype(np.uint8), mode="RGB")
+
+
+@functools.lru_cache(maxsize=8)
+def hue_bar(width: int, height: int) -> Image.Image:
+    # hues at full saturation from left to right
+    rgb = hls_to_rgb(np.arange(width) / width, 0.5, 1)
+    rgb = np.broadcast_to(np.round(rgb * 255).astype(np.uint8), (height, width, 3))
+    return Image.fromarray(np.ascontiguousarray(rgb), mode="RGB")
+
+
+def median_cut(pixels: np.ndarray, count: int = 8, samples: int = 4096) -> list:
+    # dominant (rgb, share) pairs of the opaque texels, most common first,
+    # large textures are sampled so hd skins cost the same as 64x64 ones
+    texels = pixels.reshape(-1, pixels.shape[-1])
+    if len(texels) > samples:
+        texels = texels[
+            np.random.default_rng(0).choice(len(texels), samples, replace=False)
+        ]
+
+    rgb = texels[texels[:, 3] > 0][:, :3].astype(np.int32)
+    if not len(rgb):
+        return []
+
+    boxes = [rgb]
+    while len(boxes) < count:
+        # split the box with the widest channel at its median
+        ranges = [np.ptp(box, axis=0).max() if len(box) > 1 else -1 for box in boxes]
+        index = int(np.argmax(ranges))
+        if ranges[index] <= 0:
+            break
+
+        box = boxes.pop(index)
+        channel = np.ptp(box, axis=0).argmax()
+        box = box[box[:, channel].argsort(kind="stable")]
+        half = len(box) // 2
+        boxes += [box[:half], box[half:]]
+
+    boxes.sort(key=len, reverse=True)
+    return [
+        (tuple(int(c) for c in np.round(box.mean(axis=0))), len(box) / len(rgb))
+        for box in boxes
+    ]
+
+
+class Palette(tkinter.ttk.Frame):
+    def __init__(
+        self, *args, count: int = 8, size: int = 24, command: callable = None, **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.count = count
+        self.size = size
+        self.command = command
+        self.colors = []
+
+        # texture the swatches were taken from, as (pixels, version)
+        self.source = None
+
+        self.canvas = tkinter.Canvas(
+            self,
+            width=count * size,
+            height=size,
+            borderwidth=0,
+            highlightthickness=0,
+        )
+        self.canvas.pack()
+        self.canvas.bind("<Button-1>", self._ev_click)
+
+    def set_pixels(self, pixels: np.ndarray, version: int = 0) -> None:
+        # recomputed only when the texture or its version changed, the array
+        # is kept so a new one can't be mistaken for it
+        if self.source is not None:
+            previous, previous_version = self.source
+            if pixels is previous and version == previous_version:
+                return
+
+        self.source = pixels, version
+        self.colors = [rgb for rgb, _ in median_cut(pixels, self.count)]
+        self.canvas.delete("all")
+        for i, rgb in enumerate(self.colors):
+            self.canvas.create_rectangle(
+                i * self.size,
+                0,
+                (i + 1) * self.size - 2,
+                self.size,
+                fill="#%02X%02X%02X" % rgb,
+                width=0,
+            )
+
+    def clear(self) -> None:
+        self.source = None
+        self.colors = []
+        self.canvas.delete("all")
+
+    def _ev_click(self, event: tkinter.Event) -> None:
+        index = event.x // self.size
+        if index < len(self.colors) and self.command is not None:
+            self.command(self.colors[index])
+
 
 class ColorPicker(tkinter.ttk.Frame):
     def __init__(self, *args, **kwargs) -> None:
@@ -14,8 +236,23 @@ class ColorPicker(tkinter.ttk.Frame):
         self.saturation = 0.5
         self.lightness = 0.5
 
+        # the square only changes with the hue, quantized to whole degrees,
+        # or its size, both gradients follow the size of their canvas
+        self.square_hue = None
+        self.square_size = (200, 150)
+        self.bar_size = (200, 30)
+        self.drawn_bar_size = None
+        self.output_color = None
+
+        # input events only request an update, which runs once when idle
+        self.pending = None
+
         self.sub_frame = tkinter.ttk.Frame(self)
-        self.sub_frame.grid(row=0, column=0, columnspan=4, padx=10, pady=5)
+        self.sub_frame.grid(
+            row=0, column=0, columnspan=4, padx=10, pady=5, sticky="nesw"
+        )
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure((1, 2, 3), weight=1)
 
         self.square = tkinter.Canvas(
             self.sub_frame,
@@ -25,16 +262,21 @@ class ColorPicker(tkinter.ttk.Frame):
             borderwidth=0,
             highlightthickness=0,
         )
-        self.square.pack(pady=5)
+        self.square.pack(fill="both", expand=1, pady=5)
+        self.square_image = self.square.create_image(0, 0, anchor="nw")
+        self.marker = self.square.create_oval(0, 0, 0, 0, fill="#fff", width=0)
         self.square.bind("<Button-1>", self._ev_square)
         self.square.bind("<B1-Motion>", self._ev_square)
+        self.square.bind("<Configure>", self._ev_square_resize)
 
         self.hue_bar = tkinter.Canvas(
             self.sub_frame, width=200, height=30, borderwidth=0, highlightthickness=0
         )
-        self.hue_bar.pack(pady=5)
+        self.hue_bar.pack(fill="x", pady=5)
+        self.bar_image = self.hue_bar.create_image(0, 0, anchor="nw")
         self.hue_bar.bind("<Button-1>", self._ev_hue)
         self.hue_bar.bind("<B1-Motion>", self._ev_hue)
+        self.hue_bar.bind("<Configure>", self._ev_bar_resize)
 
         self.output = tkinter.ttk.Label(self.sub_frame)
         self.output.pack(pady=5)
@@ -118,18 +360,6 @@ class ColorPicker(tkinter.ttk.Frame):
         )
         self.hsv_v_entry.grid(row=4, column=3)
 
-        for i in range(200):
-            self.hue_bar.create_line(
-                i,
-                0,
-                i,
-                30,
-                fill="#%02X%02X%02X"
-                % tuple(
-                    map(lambda x: round(x * 255), colorsys.hls_to_rgb(i / 200, 0.5, 1))
-                ),
-            )
-
         self.update()
 
     def _hex_value_cb(self, var: tkinter.StringVar) -> None:
@@ -143,21 +373,11 @@ class ColorPicker(tkinter.ttk.Frame):
                 else:
                     value = m.group("value")
 
-                if len(value) == 3:
-                    red = value[0] * 2
-                    green = value[1] * 2
-                    blue = value[2] * 2
-
-                else:
-                    red = value[:2]
-                    green = value[2:4]
-                    blue = value[4:]
-
-                self.hue, self.lightness, self.saturation = colorsys.rgb_to_hls(
-                    int(red, 16) / 255, int(green, 16) / 255, int(blue, 16) / 255
+                self.hue, self.lightness, self.saturation = rgb_to_hls(
+                    *hex_to_rgb(value)
                 )
 
-                self.update()
+                self.schedule_update()
 
     def _red_value_cb(self, var: tkinter.StringVar) -> None:
         if not self.disable_cb:
@@ -169,14 +389,9 @@ class ColorPicker(tkinter.ttk.Frame):
 
                 value = int(value)
                 if value < 256:
-                    self.hue, self.lightness, self.saturation = colorsys.rgb_to_hls(
-                        value / 255,
-                        *colorsys.hls_to_rgb(self.hue, self.lightness, self.saturation)[
-                            1:
-                        ],
-                    )
+                    self.set_channel(0, value)
 
-                    self.update()
+                    self.schedule_update()
 
     def _green_value_cb(self, var: tkinter.StringVar) -> None:
         if not self.disable_cb:
@@ -188,14 +403,9 @@ class ColorPicker(tkinter.ttk.Frame):
 
                 value = int(value)
                 if value < 256:
-                    r, _, b = colorsys.hls_to_rgb(
-                        self.hue, self.lightness, self.saturation
-                    )
-                    self.hue, self.lightness, self.saturation = colorsys.rgb_to_hls(
-                        r, value / 255, b
-                    )
+                    self.set_channel(1, value)
 
-                    self.update()
+                    self.schedule_update()
 
     def _blue_value_cb(self, var: tkinter.StringVar) -> None:
         if not self.disable_cb:
@@ -207,14 +417,9 @@ class ColorPicker(tkinter.ttk.Frame):
 
                 value = int(value)
                 if value < 256:
-                    self.hue, self.lightness, self.saturation = colorsys.rgb_to_hls(
-                        *colorsys.hls_to_rgb(self.hue, self.lightness, self.saturation)[
-                            :-1
-                        ],
-                        value / 255,
-                    )
+                    self.set_channel(2, value)
 
-                    self.update()
+                    self.schedule_update()
 
     def _hue_value_cb(self, var: tkinter.StringVar) -> None:
         if not self.disable_cb:
@@ -229,7 +434,7 @@ class ColorPicker(tkinter.ttk.Frame):
 
                 if value < 361:
                     self.hue = value / 360
-                    self.update()
+                    self.schedule_update()
 
     def _hsl_s_value_cb(self, var: tkinter.StringVar) -> None:
         if not self.disable_cb:
@@ -244,7 +449,7 @@ class ColorPicker(tkinter.ttk.Frame):
 
                 if value < 101:
                     self.saturation = value / 100
-                    self.update()
+                    self.schedule_update()
 
     def _hsl_l_value_cb(self, var: tkinter.StringVar) -> None:
         if not self.disable_cb:
@@ -259,7 +464,7 @@ class ColorPicker(tkinter.ttk.Frame):
 
                 if value < 101:
                     self.lightness = value / 100
-                    self.update()
+                    self.schedule_update()
 
     def _hsv_s_value_cb(self, var: tkinter.StringVar) -> None:
         if not self.disable_cb:
@@ -273,14 +478,12 @@ class ColorPicker(tkinter.ttk.Frame):
                     value = int(value)
 
                 if value < 101:
-                    h, _, v = colorsys.rgb_to_hsv(
-                        *colorsys.hls_to_rgb(self.hue, self.lightness, self.saturation)
-                    )
-                    self.hue, self.lightness, self.saturation = colorsys.rgb_to_hls(
-                        *colorsys.hsv_to_rgb(h, value / 100, v)
+                    h, _, v = rgb_to_hsv(*self.rgb)
+                    self.hue, self.lightness, self.saturation = rgb_to_hls(
+                        *hsv_to_rgb(h, value / 100, v)
                     )
 
-                    self.update()
+                    self.schedule_update()
 
     def _hsv_v_value_cb(self, var: tkinter.StringVar) -> None:
         if not self.disable_cb:
@@ -294,107 +497,131 @@ class ColorPicker(tkinter.ttk.Frame):
                     value = int(value)
 
                 if value < 101:
-                    h, s, _ = colorsys.rgb_to_hsv(
-                        *colorsys.hls_to_rgb(self.hue, self.lightness, self.saturation)
-                    )
-                    self.hue, self.lightness, self.saturation = colorsys.rgb_to_hls(
-                        *colorsys.hsv_to_rgb(h, s, value / 100)
+                    h, s, _ = rgb_to_hsv(*self.rgb)
+                    self.hue, self.lightness, self.saturation = rgb_to_hls(
+                        *hsv_to_rgb(h, s, value / 100)
                     )
 
-                    self.update()
+                    self.schedule_update()
+
+    @property
+    def rgb(self) -> np.ndarray:
+        # components in 0-1
+        return hls_to_rgb(self.hue, self.lightness, self.saturation)
 
     @property
     def color(self) -> str:
-        c = "#%02X%02X%02X" % tuple(
-            map(
-                lambda x: round(x * 255),
-                colorsys.hls_to_rgb(self.hue, self.lightness, self.saturation),
-            )
-        )
+        c = str(rgb_to_hex(self.rgb))
         if all([c[2 * i + 1] == c[2 * i + 2] for i in range(3)]):
             c = c[::2]
 
         return c
 
+    def set_rgb(self, rgb: tuple) -> None:
+        # rgb in 0-255
+        self.hue, self.lightness, self.saturation = rgb_to_hls(*np.divide(rgb, 255))
+        self.schedule_update()
+
+    def set_channel(self, index: int, value: int) -> None:
+        rgb = self.rgb
+        rgb[index] = value / 255
+        self.hue, self.lightness, self.saturation = rgb_to_hls(*rgb)
+
+    def schedule_update(self) -> None:
+        if self.pending is None:
+            self.pending = self.after_idle(self.update)
+
+    def destroy(self) -> None:
+        if self.pending is not None:
+            self.after_cancel(self.pending)
+            self.pending = None
+
+        super().destroy()
+
+    @staticmethod
+    def set_value(var: tkinter.StringVar, value: object) -> None:
+        # writing a variable runs its trace, so unchanged values are skipped
+        if var.get() != str(value):
+            var.set(value)
+
     def update(self) -> None:
+        self.pending = None
         self.disable_cb = True
 
         # update circle
-        circle = Image.new("RGBA", (256, 256))
-        draw = ImageDraw.Draw(circle)
-        draw.ellipse((10, 10, 245, 245), fill=self.color, outline=self.color)
-        circle = ImageTk.PhotoImage(circle.resize((40, 40)))
-        self.output.config(image=circle)
-        self.output.image = circle
+        color = self.color
+        if color != self.output_color:
+            self.output_color = color
+            circle = Image.new("RGBA", (256, 256))
+            draw = ImageDraw.Draw(circle)
+            draw.ellipse((10, 10, 245, 245), fill=color, outline=color)
+            circle = ImageTk.PhotoImage(circle.resize((40, 40)))
+            self.output.config(image=circle)
+            self.output.image = circle
 
         # update square
-        self.slice = ImageTk.PhotoImage(
-            Image.fromarray(
-                np.array(
-                    [
-                        [
-                            list(
-                                map(
-                                    lambda x: round(x * 255),
-                                    colorsys.hsv_to_rgb(
-                                        self.hue, x / 200, (150 - y) / 150
-                                    ),
-                                )
-                            )
-                            for x in range(200)
-                        ]
-                        for y in range(150)
-                    ],
-                    "uint8",
-                ),
-                mode="RGB",
-            )
+        width, height = self.square_size
+        hue = round(self.hue * 360)
+        if (hue, width, height) != self.square_hue:
+            self.square_hue = hue, width, height
+            self.slice = ImageTk.PhotoImage(sv_square(hue, width, height))
+            self.square.itemconfig(self.square_image, image=self.slice)
+
+        rgb = self.rgb
+        hsv = rgb_to_hsv(*rgb)
+        self.square.coords(
+            self.marker,
+            hsv[1] * width - 3,
+            height - hsv[2] * height - 3,
+            hsv[1] * width + 3,
+            height - hsv[2] * height + 3,
         )
 
-        self.square.create_image(0, 0, anchor="nw", image=self.slice)
-
-        hsv = colorsys.rgb_to_hsv(
-            *colorsys.hls_to_rgb(self.hue, self.lightness, self.saturation)
-        )
-        self.square.create_oval(
-            hsv[1] * 200 - 3,
-            150 - hsv[2] * 150 - 3,
-            hsv[1] * 200 + 3,
-            150 - hsv[2] * 150 + 3,
-            fill="#fff",
-            width=0,
-        )
+        # update hue bar
+        if self.bar_size != self.drawn_bar_size:
+            self.drawn_bar_size = self.bar_size
+            self.bar = ImageTk.PhotoImage(hue_bar(*self.bar_size))
+            self.hue_bar.itemconfig(self.bar_image, image=self.bar)
 
         # update hex
-        self.hex_value.set(self.color)
+        self.set_value(self.hex_value, color)
 
         # update rgb
-        rgb = colorsys.hls_to_rgb(self.hue, self.lightness, self.saturation)
-        self.red_value.set(round(rgb[0] * 255))
-        self.green_value.set(round(rgb[1] * 255))
-        self.blue_value.set(round(rgb[2] * 255))
+        self.set_value(self.red_value, round(rgb[0] * 255))
+        self.set_value(self.green_value, round(rgb[1] * 255))
+        self.set_value(self.blue_value, round(rgb[2] * 255))
 
         # update hsl
-        self.hsl_h_value.set(f"{round(self.hue * 360)}°")
-        self.hsl_s_value.set(f"{round(self.saturation * 100)}%")
-        self.hsl_l_value.set(f"{round(self.lightness * 100)}%")
+        self.set_value(self.hsl_h_value, f"{round(self.hue * 360)}°")
+        self.set_value(self.hsl_s_value, f"{round(self.saturation * 100)}%")
+        self.set_value(self.hsl_l_value, f"{round(self.lightness * 100)}%")
 
         # update hsv
-        _, s, v = colorsys.rgb_to_hsv(*rgb)
-        self.hsv_h_value.set(f"{round(self.hue * 360)}°")
-        self.hsv_s_value.set(f"{round(s*100)}%")
-        self.hsv_v_value.set(f"{round(v*100)}%")
+        _, s, v = hsv
+        self.set_value(self.hsv_h_value, f"{round(self.hue * 360)}°")
+        self.set_value(self.hsv_s_value, f"{round(s*100)}%")
+        self.set_value(self.hsv_v_value, f"{round(v*100)}%")
 
         self.disable_cb = False
 
     def _ev_hue(self, event: tkinter.Event) -> None:
-        self.hue = min(200, max(0, event.x)) / 200
-        self.update()
+        width = self.bar_size[0]
+        self.hue = min(width, max(0, event.x)) / width
+        self.schedule_update()
 
     def _ev_square(self, event: tkinter.Event) -> None:
-        saturation = min(200, max(0, event.x)) / 200
-        value = min(150, max(0, 150 - event.y)) / 150
-        _, self.lightness, self.saturation = colorsys.rgb_to_hls(
-            *colorsys.hsv_to_rgb(self.hue, saturation, value)
+        width, height = self.square_size
+        saturation = min(width, max(0, event.x)) / width
+        value = min(height, max(0, height - event.y)) / height
+        _, self.lightness, self.saturation = rgb_to_hls(
+            *hsv_to_rgb(self.hue, saturation, value)
         )
-        self.update()
+        self.schedule_update()
+
+    def _ev_square_resize(self, event: tkinter.Event) -> None:
+        self.square_size = max(1, event.width), max(1, event.height)
+        self.schedule_update()
+
+    def _ev_bar_resize(self, event: tkinter.Event) -> None:
+        self.bar_size = max(1, event.width), max(1, event.height)
+        self.schedule_update()
@@ -1,13 +1,27 @@
+import pathlib
+import tkinter.filedialog
+import tkinter.messagebox
 import tkinter.ttk
 
+import analyze
+import camera
 import color
+import history
 import popups
+import recolor
+import session
 import skin
+import store
+import transform
 
+import numpy
 import PIL.Image
+import PIL.ImageColor
 
 
 class Editor(tkinter.ttk.Frame):
+    background_color = (0.15, 0.15, 0.15)
+
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
 
@@ -17,7 +31,18 @@ class Editor(tkinter.ttk.Frame):
         self.left_frame.pack(side="left", fill="y")
 
         self.color_picker = color.ColorPicker(self.left_frame)
-        self.color_picker.pack()
+        self.color_picker.pack(fill="both", expand=1)
+
+        # dominant colours of the selected skin
+        self.palette = color.Palette(self.left_frame, command=self.color_picker.set_rgb)
+        self.palette.pack(pady=5)
+
+        self.recolor = recolor.RecolorTool(
+            self.left_frame,
+            get_color=lambda: PIL.ImageColor.getrgb(self.color_picker.color),
+            command=self.update_palette,
+        )
+        self.recolor.pack(fill="x", padx=5, pady=5)
 
         self.viewport = tkinter.ttk.Frame(self)
         self.viewport.pack(side="left", fill="both", expand=1)
@@ -28,7 +53,15 @@ class Editor(tkinter.ttk.Frame):
         tkinter.ttk.Button(self.buttons, text="New Skin", command=self.popup).pack(
             side="left"
         )
-        tkinter.ttk.Button(self.buttons, text="Load Skin").pack(side="left", padx=10)
+        tkinter.ttk.Button(self.buttons, text="Load Skin", command=self.load_skin).pack(
+            side="left", padx=10
+        )
+        tkinter.ttk.Button(self.buttons, text="Undo", command=self.undo).pack(
+            side="left"
+        )
+        tkinter.ttk.Button(self.buttons, text="Redo", command=self.redo).pack(
+            side="left", padx=10
+        )
 
         self.tabs = tkinter.ttk.Notebook(self.viewport, width=500, height=500)
         self.tabs.pack(side="bottom", fill="both", expand=1)
@@ -37,6 +70,18 @@ class Editor(tkinter.ttk.Frame):
 
         self.views = []
 
+        # saved tabs stay as empty frames until selected, keyed by frame
+        self.placeholders = {}
+        self.loading = False
+
+        # tabs share decoded textures through the store, keyed by view
+        self.store = store.get_store()
+        self.keys = {}
+
+        # undo history per tab, keyed by its view
+        self.histories = {}
+        self.history_budget = history.DEFAULT_BUDGET
+
         self.view = None
 
         self.right_frame = tkinter.ttk.Frame(self)
@@ -53,6 +98,7 @@ class Editor(tkinter.ttk.Frame):
         self.overlay_left_pants = tkinter.IntVar(self)
         self.ortho = tkinter.IntVar(self)
         self.show_grid = tkinter.IntVar(self)
+        self.show_stats = tkinter.IntVar(self)
 
         self.overlay_lookup = [
             self.overlay_hat,
@@ -127,6 +173,25 @@ class Editor(tkinter.ttk.Frame):
 
         tkinter.ttk.Separator(self.right_frame).pack(fill="x")
 
+        tkinter.ttk.Label(self.right_frame, text="Animation:").pack(anchor="w")
+        self.animation = tkinter.ttk.Combobox(
+            self.right_frame, values=["None", "Idle", "Walk"], state="readonly", width=8
+        )
+        self.animation.current(0)
+        self.animation.pack(anchor="w", pady=5)
+        self.animation.bind("<<ComboboxSelected>>", self.animation_cb)
+
+        tkinter.ttk.Button(
+            self.right_frame, text="Export Stats", command=self.export_stats
+        ).pack(side="bottom", anchor="w", pady=5)
+
+        tkinter.ttk.Checkbutton(
+            self.right_frame,
+            text="Show Stats",
+            variable=self.show_stats,
+            command=self.show_stats_cb,
+        ).pack(side="bottom", anchor="w")
+
         tkinter.ttk.Checkbutton(
             self.right_frame,
             text="Orthographic",
@@ -143,6 +208,9 @@ class Editor(tkinter.ttk.Frame):
 
         self.update_tabs()
 
+        self.winfo_toplevel().bind("<Control-z>", self.undo, add="+")
+        self.winfo_toplevel().bind("<Control-y>", self.redo, add="+")
+
     def popup(self) -> None:
         p = popups.NewSkinPopup(self)
         self.popups.append(p)
@@ -154,40 +222,183 @@ class Editor(tkinter.ttk.Frame):
         popups.NewSkinPopup.background_color = color
         for popup in self.popups:
             popup.preview.background_color = color
+            popup.preview.mark_dirty()
 
         for view in self.views:
-            view.background_color = self.background_color
+            if view not in self.placeholders:
+                view.background_color = self.background_color
+                view.mark_dirty()
+
+    def load_skin(self) -> None:
+        path = tkinter.filedialog.askopenfilename(filetypes=[("PNG", "*.png")])
+        if not path:
+            return
+
+        try:
+            skin_img = PIL.Image.open(path)
+            skin_img.load()
+
+        except OSError:
+            tkinter.messagebox.showerror("Load Skin", f"Could not read {path}")
+            return
+
+        result = analyze.analyze(numpy.asarray(skin_img.convert("RGBA")))
+        if not result["valid"]:
+            skin_img.close()
+            tkinter.messagebox.showerror(
+                "Load Skin",
+                f"Unsupported skin size {result['width']}x{result['height']}",
+            )
+            return
 
-    def create_tab(
+        if result["transparent"]:
+            tkinter.messagebox.showwarning(
+                "Load Skin",
+                f"{result['transparent']} base layer pixels are transparent",
+            )
+
+        self.create_tab(pathlib.Path(path).stem, skin_img, result["slim"])
+
+    def create_view(
         self,
-        name: str,
         skin_img: PIL.Image.Image,
-        slim: bool,
+        slim: bool = None,
         cape_img: PIL.Image.Image = None,
-    ) -> None:
+        **options,
+    ) -> skin.SkinView:
+        skin_key, skin_img = self.store.put(skin_img)
+        cape_key = None
+        if cape_img is not None:
+            cape_key, cape_img = self.store.put(cape_img)
+
+        if slim is None:
+            slim = analyze.analyze(skin_img)["slim"]
+
+        options.setdefault("rot_y", transform.ISOMETRIC_ROT_Y)
+        options.setdefault("rot_x", transform.ISOMETRIC_ROT_X)
+        options.setdefault("grid", True)
         view = skin.SkinView(
             self.tabs,
             slim=slim,
             skin_img=skin_img,
             cape_img=cape_img,
-            rot_y=-45,
-            rot_x=35.264,
-            grid=True,
             width=550,
             height=500,
             background_color=self.background_color,
+            **options,
         )
-        view.animate = True
+        view.bind("<Control-Button-1>", self.paint)
+        view.bind("<Control-B1-Motion>", self.paint)
+        view.bind("<ButtonRelease-1>", self.end_stroke)
+        view.bind("<Destroy>", self.release_view, add="+")
+        self.histories[view] = history.History(self.history_budget)
+        self.keys[view] = (skin_key, cape_key)
+        for key in self.keys[view]:
+            if key is not None:
+                self.store.acquire(key, view)
+
+        return view
+
+    def release_view(self, event: tkinter.Event) -> None:
+        # the view's textures and history go with it
+        view = event.widget
+        if view in self.keys:
+            self.store.release_all(view)
+            del self.keys[view]
+            self.histories.pop(view, None)
 
+    def create_tab(
+        self,
+        name: str,
+        skin_img: PIL.Image.Image,
+        slim: bool = None,
+        cape_img: PIL.Image.Image = None,
+    ) -> None:
+        view = self.create_view(skin_img, slim, cape_img)
         self.views.append(view)
         self.tabs.add(view, text=name, sticky="nesw")
         self.tabs.select(len(self.tabs.tabs()) - 1)
 
+    def create_placeholder(self, state: dict) -> None:
+        # no gl context or decoded pixels until the tab is first shown
+        frame = tkinter.ttk.Frame(self.tabs)
+        self.placeholders[frame] = state
+        self.views.append(frame)
+        self.tabs.add(frame, text=state["name"], sticky="nesw")
+
+    def materialize(self, index: int) -> None:
+        frame = self.views[index]
+        state = self.placeholders.pop(frame)
+        view = self.create_view(
+            session.decode_png(state["skin"]),
+            state["slim"],
+            None if state["cape"] is None else session.decode_png(state["cape"]),
+            exploded=state["exploded"],
+            grid=state["grid"],
+            show=state["show"],
+        )
+        view.camera = camera.Camera(**state["camera"])
+        if state.get("animation") is not None:
+            view.set_animation(state["animation"])
+
+        self.views[index] = view
+        self.tabs.insert(index, view, text=state["name"], sticky="nesw")
+        self.tabs.select(view)
+        self.tabs.forget(frame)
+        frame.destroy()
+
+    def tab_state(self, index: int) -> dict:
+        view = self.views[index]
+        if view in self.placeholders:
+            return self.placeholders[view]
+
+        return {
+            "name": self.tabs.tab(view, "text"),
+            "slim": bool(view.slim),
+            "exploded": bool(view.exploded),
+            "grid": bool(view.grid),
+            "show": {name: bool(shown) for name, shown in view.show.items()},
+            "camera": view.camera.state,
+            "animation": None if view.animator is None else view.animator.name,
+            "skin": session.encode_png(view.skin_img),
+            "cape": (
+                None if view.cape_img is None else session.encode_png(view.cape_img)
+            ),
+        }
+
+    def save_session(self, path: str = session.SESSION_PATH) -> None:
+        current = self.tabs.select()
+        selected = self.tabs.tabs().index(current) if current else None
+        tabs = [self.tab_state(i) for i in range(len(self.views))]
+        session.save(path, tabs, selected)
+
+    def load_session(self, path: str = session.SESSION_PATH) -> None:
+        tabs, selected = session.load(path)
+        if not tabs:
+            return
+
+        # the first tab added is selected automatically, so building views
+        # waits until every placeholder exists
+        self.loading = True
+        for state in tabs:
+            self.create_placeholder(state)
+
+        self.loading = False
+        self.tabs.select(selected or 0)
+        self.update_tabs()
+
     def update_tabs(self, event: tkinter.Event = None) -> None:
+        if self.loading:
+            return
+
         current = self.tabs.select()
         if current:
             index = self.tabs.tabs().index(current)
+            if self.views[index] in self.placeholders:
+                self.materialize(index)
+
             self.view = self.views[index]
+            self.recolor.set_target(self.view, self.histories[self.view])
 
             # update checkbuttons
             self.slim.set(self.view.slim)
@@ -200,6 +411,13 @@ class Editor(tkinter.ttk.Frame):
             self.overlay_left_pants.set(self.view.show["left-pants"])
             self.ortho.set(self.view.ortho)
             self.show_grid.set(self.view.grid)
+            self.show_stats.set(self.view.show_stats)
+            self.animation.set(
+                "None"
+                if self.view.animator is None
+                else self.view.animator.name.title()
+            )
+            self.update_palette()
 
         else:
             # update checkbuttons
@@ -213,25 +431,96 @@ class Editor(tkinter.ttk.Frame):
             self.overlay_left_pants.set(True)
             self.ortho.set(False)
             self.show_grid.set(True)
+            self.show_stats.set(False)
+            self.animation.set("None")
+            self.palette.clear()
+            self.recolor.set_target(None, None)
 
     def slim_cb(self) -> None:
         if self.view:
             self.view.slim = self.slim.get()
+            self.view.mark_dirty()
 
     def exploded_cb(self) -> None:
         if self.view:
             self.view.exploded = self.exploded.get()
+            self.view.mark_dirty()
 
     def overlays_cb(self, var: tkinter.IntVar) -> None:
         if self.view:
             self.view.show[self.overlay_lookup[self.overlay_lookup.index(var) + 1]] = (
                 var.get()
             )
+            self.view.mark_dirty()
 
     def ortho_cb(self) -> None:
         if self.view:
             self.view.ortho = self.ortho.get()
+            self.view.mark_dirty()
+
+    def animation_cb(self, event: tkinter.Event = None) -> None:
+        if self.view:
+            name = self.animation.get().lower()
+            self.view.set_animation(None if name == "none" else name)
 
     def show_grid_cb(self) -> None:
         if self.view:
             self.view.grid = self.show_grid.get()
+            self.view.mark_dirty()
+
+    def paint(self, event: tkinter.Event) -> None:
+        self.recolor.apply()
+        view = event.widget
+        hit = view.pick(event.x, event.y)
+        if hit is not None and hit[1] != "cape":
+            color = PIL.ImageColor.getrgb(self.color_picker.color) + (255,)
+            x, y = hit[3]
+            self.histories[view].touch(view.skin_img, x, y, x + 1, y + 1)
+            view.paint(x, y, color)
+
+    def end_stroke(self, event: tkinter.Event) -> None:
+        # everything painted since the button went down is one undo step
+        view = event.widget
+        self.histories[view].commit(view.skin_img)
+        self.update_palette()
+
+    def undo(self, event: tkinter.Event = None) -> None:
+        if self.view:
+            self.recolor.apply()
+            self.view.own_skin()
+            for region in self.histories[self.view].undo(self.view.skin_img):
+                self.view.update_skin(*region)
+
+            self.update_palette()
+
+    def redo(self, event: tkinter.Event = None) -> None:
+        if self.view:
+            self.recolor.apply()
+            self.view.own_skin()
+            for region in self.histories[self.view].redo(self.view.skin_img):
+                self.view.update_skin(*region)
+
+            self.update_palette()
+
+    def update_palette(self) -> None:
+        if self.view and self.view not in self.placeholders:
+            self.palette.set_pixels(self.view.skin_img, self.view.skin_version)
+
+    def show_stats_cb(self) -> None:
+        if self.view:
+            self.view.set_show_stats(self.show_stats.get())
+            self.view.mark_dirty()
+
+    def export_stats(self) -> None:
+        path = tkinter.filedialog.asksaveasfilename(
+            defaultextension=".csv", filetypes=[("CSV", "*.csv")]
+        )
+        if path:
+            self.dump_stats(path)
+
+    def dump_stats(self, path: str) -> None:
+        # one row per recorded frame, labelled with the tab it came from
+        with open(path, "w", newline="") as fp:
+            views = [view for view in self.views if view not in self.placeholders]
+            for i, view in enumerate(views):
+                view.stats.write_csv(fp, self.tabs.tab(view, "text"), header=i == 0)
@@ -0,0 +1,118 @@
+import collections
+import zlib
+
+import numpy
+
+TILE_SIZE = 16
+
+# bytes of compressed deltas kept per tab before the oldest actions are dropped
+DEFAULT_BUDGET = 4 * 1024 * 1024
+
+
+class History:
+    def __init__(
+        self, budget: int = DEFAULT_BUDGET, tile_size: int = TILE_SIZE
+    ) -> None:
+        self.budget = budget
+        self.tile_size = tile_size
+
+        # each action is a list of (x, y, width, height, compressed xor delta)
+        self.undo_stack = collections.deque()
+        self.redo_stack = []
+        self.size = 0
+
+        # tiles copied before the open action first wrote to them
+        self.before = {}
+
+    def touch(self, pixels: numpy.ndarray, x0: int, y0: int, x1: int, y1: int) -> None:
+        # call before writing to pixels[y0:y1, x0:x1]
+        height, width = pixels.shape[:2]
+        x0, x1 = max(0, x0), min(width, x1)
+        y0, y1 = max(0, y0), min(height, y1)
+        size = self.tile_size
+        for ty in range(y0 // size, -(-y1 // size)):
+            for tx in range(x0 // size, -(-x1 // size)):
+                if (tx, ty) not in self.before:
+                    tile = pixels[
+                        ty * size : ty * size + size, tx * size : tx * size + size
+                    ]
+                    self.before[tx, ty] = tile.copy()
+
+    def commit(self, pixels: numpy.ndarray) -> bool:
+        # close the open action, only tiles that really changed are kept
+        action = []
+        size = self.tile_size
+        for (tx, ty), before in self.before.items():
+            after = pixels[ty * size : ty * size + size, tx * size : tx * size + size]
+            delta = before ^ after
+            if delta.any():
+                height, width = delta.shape[:2]
+                data = zlib.compress(delta.tobytes(), 1)
+                action.append((tx * size, ty * size, width, height, data))
+
+        self.before.clear()
+        if not action:
+            return False
+
+        self.size -= sum(self.action_size(a) for a in self.redo_stack)
+        self.redo_stack.clear()
+        self.undo_stack.append(action)
+        self.size += self.action_size(action)
+
+        # drop the oldest actions once over budget
+        while self.size > self.budget and self.undo_stack:
+            self.size -= self.action_size(self.undo_stack.popleft())
+
+        return True
+
+    @staticmethod
+    def action_size(action: list) -> int:
+        return sum(len(data) for *_, data in action)
+
+    @staticmethod
+    def apply(pixels: numpy.ndarray, action: list) -> list:
+        # xor deltas toggle between the before and after states, so undo and
+        # redo are the same operation and only touch the changed tiles
+        regions = []
+        for x, y, width, height, data in action:
+            delta = numpy.frombuffer(zlib.decompress(data), pixels.dtype)
+            pixels[y : y + height, x : x + width] ^= delta.reshape(
+                height, width, *pixels.shape[2:]
+            )
+            regions.append((x, y, x + width, y + height))
+
+        return regions
+
+    def undo(self, pixels: numpy.ndarray) -> list:
+        # returns the (x0, y0, x1, y1) regions that changed
+        self.commit(pixels)
+        if not self.undo_stack:
+            return []
+
+        action = self.undo_stack.pop()
+        self.redo_stack.append(action)
+        return self.apply(pixels, action)
+
+    def redo(self, pixels: numpy.ndarray) -> list:
+        # a pending edit starts a new branch and discards the redo stack
+        self.commit(pixels)
+        if not self.redo_stack:
+            return []
+
+        action = self.redo_stack.pop()
+        self.undo_stack.append(action)
+        return self.apply(pixels, action)
+
+    def clear(self) -> None:
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.before.clear()
+        self.size = 0
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack or self.before)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
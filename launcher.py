@@ -5,10 +5,13 @@ import json
 import pathlib
 import subprocess
 import tkinter
+import tkinter.messagebox
 import uuid
 import zipfile
 
 import editor
+import store
+import wardrobe
 
 import lxml.etree
 import PIL.Image
@@ -95,10 +98,36 @@ class Launcher(tkinter.Tk):
         self.editor = editor.Editor(self.content_frame)
         self.content_frame.add(self.editor, text="Skin Editor")
 
+        # add wardrobe tab
+        self.wardrobe = wardrobe.Wardrobe(self.content_frame)
+        self.content_frame.add(self.wardrobe, text="Wardrobe")
+        self.load_wardrobe()
+
         sv_ttk.set_theme("dark")
-        self.editor.set_background_color((0.15, 0.15, 0.15))
+        self.set_background_color((0.15, 0.15, 0.15))
         self.theme_button.config(image=self.sun_image)
 
+        # restored tabs are built with the theme's background, textures only
+        # kept by earlier sessions' tabs are removed once they hold their refs
+        self.editor.load_session()
+        store.get_store().collect()
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def close(self) -> None:
+        # the window closes even when the session can't be saved
+        try:
+            self.editor.save_session()
+
+        except OSError as e:
+            tkinter.messagebox.showerror("Save Session", f"Could not save tabs: {e}")
+
+        finally:
+            self.destroy()
+
+        # destroyed tabs have released their textures
+        store.get_store().collect()
+
     def create_java_instance(
         self, name: str, version: str, loader: str = None, loader_version: str = None
     ) -> str:
@@ -362,7 +391,11 @@ class Launcher(tkinter.Tk):
 
     @staticmethod
     def get_skin(player_uuid: str) -> tuple:
-        # fetch skin & cape from mojang api
+        # fetch skin & cape from mojang api, both are kept in the texture store
+        # referenced by the profile and returned as images
+        textures_store = store.get_store()
+        owner = f"profile:{player_uuid}"
+        keys = {}
         with requests.Session() as s:
             response = s.get(
                 f"https://sessionserver.mojang.com/session/minecraft/profile/{player_uuid}"
@@ -377,25 +410,31 @@ class Launcher(tkinter.Tk):
                 try:
                     response = s.get(textures["SKIN"]["url"])
                     if response.ok:
-                        skin = PIL.Image.open(io.BytesIO(response.content))
-
-                    else:
-                        skin = None
+                        keys["skin"] = textures_store.put(
+                            PIL.Image.open(io.BytesIO(response.content))
+                        )
 
                 except KeyError:
-                    skin = None
+                    pass
 
                 try:
                     response = s.get(textures["CAPE"]["url"])
                     if response.ok:
-                        cape = PIL.Image.open(io.BytesIO(response.content))
-
-                    else:
-                        cape = None
+                        keys["cape"] = textures_store.put(
+                            PIL.Image.open(io.BytesIO(response.content))
+                        )
 
                 except KeyError:
-                    cape = None
+                    pass
+
+                textures_store.release_all(owner)
+                for key, _ in keys.values():
+                    textures_store.acquire(key, owner, persistent=True)
 
+        skin, cape = (
+            PIL.Image.fromarray(keys[name][1], "RGBA") if name in keys else None
+            for name in ("skin", "cape")
+        )
         return skin, cape
 
     @staticmethod
@@ -406,15 +445,30 @@ class Launcher(tkinter.Tk):
         face.paste(overlay, (0, 0), overlay)
         return face
 
+    def load_wardrobe(self) -> None:
+        with open("skins.json", "r") as fp:
+            skins = json.load(fp)["default"]
+
+        for arms in skins.values():
+            for arm, data in arms.items():
+                self.wardrobe.add(
+                    PIL.Image.open(io.BytesIO(base64.b64decode(data))), arm == "slim"
+                )
+
+    def set_background_color(self, color: tuple) -> None:
+        self.editor.set_background_color(color)
+        self.wardrobe.background_color = color
+        self.wardrobe.mark_dirty()
+
     def toggle_theme(self) -> None:
         if self.tk.call("ttk::style", "theme", "use") == "sun-valley-dark":
             self.tk.call("set_theme", "light")
-            self.editor.set_background_color((0.9, 0.9, 0.9))
+            self.set_background_color((0.9, 0.9, 0.9))
             self.theme_button.config(image=self.moon_image)
 
         else:
             self.tk.call("set_theme", "dark")
-            self.editor.set_background_color((0.15, 0.15, 0.15))
+            self.set_background_color((0.15, 0.15, 0.15))
             self.theme_button.config(image=self.sun_image)
 
 
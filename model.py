@@ -0,0 +1,636 @@
+import functools
+
+import transform
+
+import numpy
+
+UNIT_CUBE = numpy.array(
+    [
+        [-0.5, -0.5, 0.5, 1],
+        [-0.5, 0.5, 0.5, 1],
+        [0.5, 0.5, 0.5, 1],
+        [0.5, -0.5, 0.5, 1],
+        [0.5, -0.5, -0.5, 1],
+        [0.5, 0.5, -0.5, 1],
+        [-0.5, 0.5, -0.5, 1],
+        [-0.5, -0.5, -0.5, 1],
+    ],
+    numpy.float32,
+)
+UNIT_CUBE.flags.writeable = False
+
+# cube edges swept along each axis to draw the pixel grid
+GRID_EDGES = (
+    # front, back, top, bottom
+    ((0, 1), (6, 7), (1, 6), (0, 7)),
+    # front, back, right, left
+    ((0, 3), (4, 7), (0, 7), (3, 4)),
+    # top, bottom, right, left
+    ((5, 6), (4, 7), (6, 7), (4, 5)),
+)
+
+
+def grid_lines(
+    vertices: numpy.ndarray, edges: tuple, axis: int, pixels: int
+) -> numpy.ndarray:
+    offsets = numpy.zeros((pixels + 1, 1, 1, 4), numpy.float32)
+    offsets[:, 0, 0, axis] = numpy.arange(pixels + 1) / pixels
+    return (vertices[numpy.array(edges)] + offsets).reshape(-1, 2, 4)
+
+
+class Box:
+    __slots__ = (
+        "pos_x",
+        "pos_y",
+        "pos_z",
+        "exp_x",
+        "exp_y",
+        "exp_z",
+        "scl_x",
+        "scl_y",
+        "scl_z",
+        "piv_x",
+        "piv_y",
+        "piv_z",
+        "rot_x",
+        "rot_y",
+        "rot_z",
+        "vertices",
+        "grid",
+        "quads",
+        "array",
+        "matrices",
+    )
+
+    def __init__(
+        self,
+        pos_x: float,
+        pos_y: float,
+        pos_z: float,
+        exp_x: float,
+        exp_y: float,
+        exp_z: float,
+        pix_x: float,
+        pix_y: float,
+        pix_z: float,
+        piv_x: float,
+        piv_y: float,
+        piv_z: float,
+        rot_x: float,
+        rot_y: float,
+        rot_z: float,
+        u: float,
+        v: float,
+        inc: float = 0,
+        texture_width: int = 64,
+        texture_height: int = 64,
+    ) -> None:
+        self.pos_x = pos_x
+        self.pos_y = pos_y
+        self.pos_z = pos_z
+
+        self.exp_x = exp_x
+        self.exp_y = exp_y
+        self.exp_z = exp_z
+
+        self.scl_x = pix_x + inc
+        self.scl_y = pix_y + inc
+        self.scl_z = pix_z + inc
+
+        self.piv_x = piv_x
+        self.piv_y = piv_y
+        self.piv_z = piv_z
+
+        self.rot_x = rot_x
+        self.rot_y = rot_y
+        self.rot_z = rot_z
+
+        self.vertices = UNIT_CUBE
+
+        # grid lines wrapping the x, y and z axes, one (start, end) pair per line
+        self.grid = numpy.concatenate(
+            (
+                grid_lines(self.vertices, GRID_EDGES[0], 0, pix_x),
+                grid_lines(self.vertices, GRID_EDGES[1], 1, pix_y),
+                grid_lines(self.vertices, GRID_EDGES[2], 2, pix_z),
+            )
+        )
+        self.grid.flags.writeable = False
+
+        # u and v are fractions of the texture, face sizes are in texels of its
+        # standard resolution, so hd textures of the same layout map identically
+        self.quads = (
+            (  # front
+                0,
+                1,
+                2,
+                3,
+                u + pix_z / texture_width,
+                v + (pix_y + pix_z) / texture_height,
+                u + pix_z / texture_width,
+                v + pix_z / texture_height,
+                u + (pix_x + pix_z) / texture_width,
+                v + pix_z / texture_height,
+                u + (pix_x + pix_z) / texture_width,
+                v + (pix_y + pix_z) / texture_height,
+            ),
+            (  # back
+                4,
+                5,
+                6,
+                7,
+                u + (2 * pix_z + pix_x) / texture_width,
+                v + (pix_y + pix_z) / texture_height,
+                u + (2 * pix_z + pix_x) / texture_width,
+                v + pix_z / texture_height,
+                u + (2 * pix_z + 2 * pix_x) / texture_width,
+                v + pix_z / texture_height,
+                u + (2 * pix_z + 2 * pix_x) / texture_width,
+                v + (pix_y + pix_z) / texture_height,
+            ),
+            (  # top
+                1,
+                6,
+                5,
+                2,
+                u + pix_z / texture_width,
+                v + pix_z / texture_height,
+                u + pix_z / texture_width,
+                v,
+                u + (pix_x + pix_z) / texture_width,
+                v,
+                u + (pix_x + pix_z) / texture_width,
+                v + pix_z / texture_height,
+            ),
+            (  # bottom
+                0,
+                7,
+                4,
+                3,
+                u + (pix_x + pix_z) / texture_width,
+                v + pix_z / texture_height,
+                u + (pix_x + pix_z) / texture_width,
+                v,
+                u + (2 * pix_x + pix_z) / texture_width,
+                v,
+                u + (2 * pix_x + pix_z) / texture_width,
+                v + pix_z / texture_height,
+            ),
+            (  # right
+                7,
+                6,
+                1,
+                0,
+                u,
+                v + (pix_y + pix_z) / texture_height,
+                u,
+                v + pix_z / texture_height,
+                u + pix_z / texture_width,
+                v + pix_z / texture_height,
+                u + pix_z / texture_width,
+                v + (pix_y + pix_z) / texture_height,
+            ),
+            (  # left
+                3,
+                2,
+                5,
+                4,
+                u + (pix_x + pix_z) / texture_width,
+                v + (pix_y + pix_z) / texture_height,
+                u + (pix_x + pix_z) / texture_width,
+                v + pix_z / texture_height,
+                u + (pix_x + 2 * pix_z) / texture_width,
+                v + pix_z / texture_height,
+                u + (pix_x + 2 * pix_z) / texture_width,
+                v + (pix_y + pix_z) / texture_height,
+            ),
+        )
+        # interleaved (u, v, x, y, z, w) for each quad corner
+        self.array = numpy.empty((len(self.quads) * 4, 6), numpy.float32)
+        for i, face in enumerate(self.quads):
+            self.array[i * 4 : i * 4 + 4, 0] = face[4::2]
+            self.array[i * 4 : i * 4 + 4, 1] = face[5::2]
+            self.array[i * 4 : i * 4 + 4, 2:] = self.vertices[list(face[:4])]
+
+        self.array.flags.writeable = False
+
+        self.matrices = {}
+
+    def matrix(self, exploded: bool) -> numpy.ndarray:
+        # part transform applied before drawing the unit cube
+        exploded = bool(exploded)
+        if exploded not in self.matrices:
+            if exploded:
+                offset = transform.translate(self.exp_x, self.exp_y, self.exp_z)
+
+            else:
+                offset = transform.translate(self.pos_x, self.pos_y, self.pos_z)
+
+            self.matrices[exploded] = (
+                transform.translate(self.piv_x, self.piv_y, self.piv_z)
+                @ transform.rotate(self.rot_z, 0, 0, 1)
+                @ transform.rotate(self.rot_y, 0, 1, 0)
+                @ transform.rotate(self.rot_x, 1, 0, 0)
+                @ transform.translate(-self.piv_x, -self.piv_y, -self.piv_z)
+                @ offset
+                @ transform.scale(self.scl_x, self.scl_y, self.scl_z)
+            )
+            self.matrices[exploded].flags.writeable = False
+
+        return self.matrices[exploded]
+
+
+# pos, exploded pos, size in pixels, pivot, rotation, uv, inflation
+BASE = {
+    "hat": (0, 28, 0, 0, 33, 0, 8, 8, 8, 0, 24, 0, 0, 0, 0, 0, 0),
+    "jacket": (0, 18, 0, 0, 18, 0, 8, 12, 4, 0, 24, 0, 0, 0, 0, 0.25, 0.25),
+    "right-pants": (-2, 6, 0, -4.5, 1, 0, 4, 12, 4, -1.9, 12, 0, 0, 0, 0, 0, 0.25),
+    "left-pants": (2, 6, 0, 4.5, 1, 0, 4, 12, 4, 1.9, 12, 0, 0, 0, 0, 0.25, 0.75),
+}
+
+OVERLAYS = {
+    "hat": (0, 28, 0, 0, 33, 0, 8, 8, 8, 0, 24, 0, 0, 0, 0, 0.5, 0, 1),
+    "jacket": (0, 18, 0, 0, 18, 0, 8, 12, 4, 0, 24, 0, 0, 0, 0, 0.25, 0.5, 0.5),
+    "right-pants": (
+        -2,
+        6,
+        0,
+        -4.5,
+        1,
+        0,
+        4,
+        12,
+        4,
+        -1.9,
+        12,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0.5,
+        0.5,
+    ),
+    "left-pants": (2, 6, 0, 4.5, 1, 0, 4, 12, 4, 1.9, 12, 0, 0, 0, 0, 0, 0.75, 0.5),
+}
+
+CLASSIC_ARMS = {
+    "base": {
+        "right-sleeve": (
+            -6,
+            18,
+            0,
+            -11,
+            18,
+            0,
+            4,
+            12,
+            4,
+            -5,
+            22,
+            0,
+            0,
+            0,
+            0,
+            0.625,
+            0.25,
+        ),
+        "left-sleeve": (6, 18, 0, 11, 18, 0, 4, 12, 4, 5, 22, 0, 0, 0, 0, 0.5, 0.75),
+    },
+    "overlays": {
+        "right-sleeve": (
+            -6,
+            18,
+            0,
+            -11,
+            18,
+            0,
+            4,
+            12,
+            4,
+            -5,
+            22,
+            0,
+            0,
+            0,
+            0,
+            0.625,
+            0.5,
+            0.5,
+        ),
+        "left-sleeve": (
+            6,
+            18,
+            0,
+            11,
+            18,
+            0,
+            4,
+            12,
+            4,
+            5,
+            22,
+            0,
+            0,
+            0,
+            0,
+            0.75,
+            0.75,
+            0.5,
+        ),
+    },
+}
+
+SLIM_ARMS = {
+    "base": {
+        "right-sleeve": (
+            -5.5,
+            18,
+            0,
+            -10.5,
+            18,
+            0,
+            3,
+            12,
+            4,
+            -5,
+            21.5,
+            0,
+            0,
+            0,
+            0,
+            0.625,
+            0.25,
+        ),
+        "left-sleeve": (
+            5.5,
+            18,
+            0,
+            10.5,
+            18,
+            0,
+            3,
+            12,
+            4,
+            5,
+            21.5,
+            0,
+            0,
+            0,
+            0,
+            0.5,
+            0.75,
+        ),
+    },
+    "overlays": {
+        "right-sleeve": (
+            -5.5,
+            18,
+            0,
+            -10.5,
+            18,
+            0,
+            3,
+            12,
+            4,
+            -5,
+            21.5,
+            0,
+            0,
+            0,
+            0,
+            0.625,
+            0.5,
+            0.5,
+        ),
+        "left-sleeve": (
+            5.5,
+            18,
+            0,
+            10.5,
+            18,
+            0,
+            3,
+            12,
+            4,
+            5,
+            21.5,
+            0,
+            0,
+            0,
+            0,
+            0.75,
+            0.75,
+            0.5,
+        ),
+    },
+}
+
+# capes use a 64x32 layout
+CAPE = (0, 16, -3.5, 0, 16, 1.5, 10, 16, 1, 0, 24, -3, -15, 180, 0, 0, 0, 0, 64, 32)
+
+
+# two triangles covering each quad of Box.array
+QUAD_TRIANGLES = numpy.array([0, 1, 2, 0, 2, 3])
+
+
+def triangulate(quads: numpy.ndarray) -> numpy.ndarray:
+    corners = numpy.arange(0, len(quads), 4)[:, None] + QUAD_TRIANGLES
+    return quads[corners.ravel()]
+
+
+# quad order used by Box.quads
+FACES = ("front", "back", "top", "bottom", "right", "left")
+
+# face entered through the (-0.5, +0.5) side of the x, y and z slabs
+SLAB_FACES = numpy.array([[4, 5], [3, 2], [1, 0]])
+
+
+class Model:
+    __slots__ = (
+        "slim",
+        "base",
+        "overlays",
+        "cape",
+        "parts",
+        "matrices",
+        "inverses",
+        "vertices",
+        "ranges",
+    )
+
+    def __init__(self, slim: bool) -> None:
+        self.slim = slim
+        arm = SLIM_ARMS if slim else CLASSIC_ARMS
+
+        self.base = {name: Box(*args) for name, args in BASE.items()}
+        self.base.update({name: Box(*args) for name, args in arm["base"].items()})
+
+        self.overlays = {name: Box(*args) for name, args in OVERLAYS.items()}
+        self.overlays.update(
+            {name: Box(*args) for name, args in arm["overlays"].items()}
+        )
+
+        self.cape = get_cape()
+
+        # (layer, name, box) in draw order, indexed by the shader's part number
+        self.parts = (("cape", "cape", self.cape),)
+        self.parts += tuple(("base", name, box) for name, box in self.base.items())
+        self.parts += tuple(
+            ("overlays", name, box) for name, box in self.overlays.items()
+        )
+
+        self.matrices = {}
+        self.inverses = {}
+        self.vertices = None
+        self.ranges = None
+
+    def part_matrices(self, exploded: bool) -> numpy.ndarray:
+        exploded = bool(exploded)
+        if exploded not in self.matrices:
+            matrices = numpy.array([box.matrix(exploded) for *_, box in self.parts])
+            matrices.flags.writeable = False
+            self.matrices[exploded] = matrices
+
+        return self.matrices[exploded]
+
+    def mesh(self) -> tuple:
+        # (x, y, z, u, v, part) rows: every surface triangle, then every grid line
+        if self.vertices is None:
+            surfaces = []
+            lines = []
+            for index, (layer, _, box) in enumerate(self.parts):
+                triangles = triangulate(box.array)
+                surfaces.append(
+                    numpy.column_stack(
+                        (
+                            triangles[:, 2:5],
+                            triangles[:, :2],
+                            numpy.full(len(triangles), index),
+                        )
+                    )
+                )
+
+                if layer != "cape":
+                    grid = box.grid.reshape(-1, 4)[:, :3] * 1.001
+                    lines.append(
+                        numpy.column_stack(
+                            (
+                                grid,
+                                numpy.zeros((len(grid), 2)),
+                                numpy.full(len(grid), index),
+                            )
+                        )
+                    )
+
+            surfaces = numpy.concatenate(surfaces)
+            lines = numpy.concatenate(lines)
+            self.vertices = numpy.concatenate((surfaces, lines)).astype(numpy.float32)
+            self.vertices.flags.writeable = False
+            self.ranges = {
+                "surfaces": (0, len(surfaces)),
+                "grid": (len(surfaces), len(lines)),
+            }
+
+        return self.vertices, self.ranges
+
+    def visibility(self, show: dict, cape: bool = False) -> numpy.ndarray:
+        return numpy.array(
+            [
+                layer == "base" or (cape if layer == "cape" else show.get(name, True))
+                for layer, name, _ in self.parts
+            ]
+        )
+
+    def outlined(self, show: dict) -> numpy.ndarray:
+        # grid lines follow the overlay when it is shown and the base otherwise
+        return numpy.array(
+            [
+                layer != "cape" and (layer == "overlays") == show.get(name, True)
+                for layer, name, _ in self.parts
+            ]
+        )
+
+    def pick(
+        self,
+        origin: numpy.ndarray,
+        direction: numpy.ndarray,
+        exploded: bool,
+        show: dict,
+        cape: bool = False,
+        matrices: numpy.ndarray = None,
+        skin: numpy.ndarray = None,
+    ) -> tuple:
+        # ray cast against every box at once in each box's unit cube space,
+        # matrices overrides the rest pose when the model is animated, overlay
+        # texels with no alpha in skin are seen through like the shader does
+        exploded = bool(exploded)
+        if matrices is not None:
+            inverse = numpy.linalg.inv(matrices)
+
+        else:
+            if exploded not in self.inverses:
+                self.inverses[exploded] = numpy.linalg.inv(self.part_matrices(exploded))
+
+            inverse = self.inverses[exploded]
+
+        visible = self.visibility(show, cape)
+
+        o = inverse @ numpy.array([*origin[:3], 1])
+        d = inverse @ numpy.array([*direction[:3], 0])
+        o = o[:, :3]
+        d = d[:, :3]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            low = (-0.5 - o) / d
+            high = (0.5 - o) / d
+
+        near = numpy.fmin(low, high)
+        far = numpy.fmax(low, high)
+        enter = numpy.nanmax(near, axis=1)
+        leave = numpy.nanmin(far, axis=1)
+        hits = numpy.flatnonzero(visible & (enter <= leave) & (enter >= 0))
+        for index in hits[enter[hits].argsort(kind="stable")]:
+            layer, name, box = self.parts[index]
+
+            axis = near[index].argmax()
+            face = SLAB_FACES[axis, int(d[index, axis] < 0)]
+            point = o[index] + enter[index] * d[index]
+
+            # locate the hit inside the face quad and interpolate its uvs
+            corners = box.array[face * 4 : face * 4 + 4]
+            edge_s = corners[2, 2:5] - corners[1, 2:5]
+            edge_t = corners[0, 2:5] - corners[1, 2:5]
+            s = numpy.clip((point - corners[1, 2:5]) @ edge_s / (edge_s @ edge_s), 0, 1)
+            t = numpy.clip((point - corners[1, 2:5]) @ edge_t / (edge_t @ edge_t), 0, 1)
+            uv = (
+                corners[1, :2]
+                + s * (corners[2, :2] - corners[1, :2])
+                + t * (corners[0, :2] - corners[1, :2])
+            )
+            u, v = float(uv[0]), float(uv[1])
+            if layer == "overlays" and skin is not None:
+                height, width = skin.shape[:2]
+                x, y = min(int(u * width), width - 1), min(int(v * height), height - 1)
+                if skin[y, x, 3] == 0:
+                    continue
+
+            return name, layer, FACES[face], (u, v)
+
+        return None
+
+
+MODELS = {}
+
+
+@functools.cache
+def get_cape() -> Box:
+    return Box(*CAPE)
+
+
+def get_model(slim: bool) -> Model:
+    # built once per process and shared between every view
+    slim = bool(slim)
+    if slim not in MODELS:
+        MODELS[slim] = Model(slim)
+
+    return MODELS[slim]
@@ -1,8 +1,11 @@
 import base64
 import io
 import json
+import pathlib
+import tkinter.filedialog
 import tkinter.ttk
 
+import analyze
 import skin
 
 import PIL.Image
@@ -65,14 +68,26 @@ class NewSkinPopup(tkinter.ttk.Frame):
         self.template_choice.grid(row=2, column=3)
         self.template_choice.bind("<FocusIn>", lambda _: self.update_preview())
 
+        tkinter.ttk.Radiobutton(
+            content,
+            text="Use a file",
+            variable=self.template,
+            value=2,
+            command=self.update_preview,
+        ).grid(row=3, column=2, sticky="w", padx=10)
+        tkinter.ttk.Button(content, text="Browse", command=self.browse).grid(
+            row=3, column=3
+        )
+        self.file_path = None
+
         self.preview = skin.SkinView(
             self,
             slim=False,
             skin_img=self.get_template_skin(False),
             background_color=self.background_color,
         )
-        self.preview.animate = True
         self.preview.pack(fill="both", expand=1, padx=10)
+        self.preview.set_animation("idle")
 
         # buttons
         button_panel = tkinter.ttk.Frame(self)
@@ -86,7 +101,10 @@ class NewSkinPopup(tkinter.ttk.Frame):
 
     def create(self) -> None:
         slim = self.slim.get()
-        if self.template.get():
+        if self.template.get() == 2 and self.file_path is not None:
+            skin = PIL.Image.open(self.file_path)
+
+        elif self.template.get():
             skin = self.get_default_skin(self.template_choice.get(), slim)
 
         else:
@@ -104,7 +122,12 @@ class NewSkinPopup(tkinter.ttk.Frame):
         self.template_choice.select_clear()
         self.preview.slim = self.slim.get()
 
-        if self.template.get():
+        if self.template.get() == 2:
+            self.template_choice.config(state="disabled")
+            if self.file_path is not None:
+                self.preview.set_skin(PIL.Image.open(self.file_path))
+
+        elif self.template.get():
             self.template_choice.config(state="readonly")
             self.preview.set_skin(
                 self.get_default_skin(self.template_choice.get(), self.slim.get())
@@ -114,6 +137,24 @@ class NewSkinPopup(tkinter.ttk.Frame):
             self.template_choice.config(state="disabled")
             self.preview.set_skin(self.get_template_skin(self.slim.get()))
 
+    def browse(self) -> None:
+        path = tkinter.filedialog.askopenfilename(filetypes=[("PNG", "*.png")])
+        if not path:
+            return
+
+        # arm width is detected from the texture instead of asked for
+        result = analyze.analyze_image(PIL.Image.open(path))
+        if not result["valid"]:
+            return
+
+        self.file_path = path
+        self.slim.set(result["slim"])
+        if not self.name.get():
+            self.name.insert(0, pathlib.Path(path).stem)
+
+        self.template.set(2)
+        self.update_preview()
+
     def show(self) -> None:
         self.place(anchor="c", relx=0.5, rely=0.5, width=400, height=350)
 
@@ -0,0 +1,255 @@
+import tkinter.ttk
+
+import analyze
+import color
+import history
+import skin
+
+import numpy
+
+# choices as shown, None matches every part or layer
+PARTS = {
+    "All": None,
+    "Head": "hat",
+    "Body": "jacket",
+    "Right Arm": "right-sleeve",
+    "Left Arm": "left-sleeve",
+    "Right Leg": "right-pants",
+    "Left Leg": "left-pants",
+}
+
+LAYERS = {"Both": None, "Base": "base", "Overlay": "overlays"}
+
+
+def select(
+    pixels: numpy.ndarray,
+    slim: bool,
+    layer: str = None,
+    part: str = None,
+    rgb: tuple = None,
+    tolerance: int = 0,
+) -> numpy.ndarray:
+    # opaque texels of the matching parts, limited to those no further than
+    # tolerance from rgb in any channel when it is given
+    scale = pixels.shape[1] // 64
+    mask = analyze.uv_mask(bool(slim), scale, layer, part) & (pixels[..., 3] > 0)
+    if rgb is not None:
+        distance = numpy.abs(pixels[..., :3].astype(int) - rgb[:3]).max(axis=-1)
+        mask &= distance <= tolerance
+
+    return mask
+
+
+def shift(
+    hls: numpy.ndarray, hue: float = 0, saturation: float = 0, lightness: float = 0
+) -> numpy.ndarray:
+    # (..., 3) hls components to shifted rgb texels, hue wraps around and
+    # the others are clamped
+    h = (hls[..., 0] + hue) % 1
+    l = numpy.clip(hls[..., 1] + lightness, 0, 1)
+    s = numpy.clip(hls[..., 2] + saturation, 0, 1)
+    return numpy.round(color.hls_to_rgb(h, l, s) * 255).astype(numpy.uint8)
+
+
+class Selection:
+    def __init__(self, pixels: numpy.ndarray, mask: numpy.ndarray) -> None:
+        rows, cols = numpy.nonzero(mask)
+        self.box = cols.min(), rows.min(), cols.max() + 1, rows.max() + 1
+        x0, y0, x1, y1 = self.box
+        self.mask = mask[y0:y1, x0:x1]
+
+        # every preview starts from the original texels so shifts never compound
+        self.original = pixels[y0:y1, x0:x1].copy()
+        rgb = self.original[self.mask][:, :3] / 255
+        self.hls = color.rgb_to_hls(*numpy.moveaxis(rgb, -1, 0))
+
+    def preview(
+        self, pixels: numpy.ndarray, hue: float, saturation: float, lightness: float
+    ) -> None:
+        x0, y0, x1, y1 = self.box
+        pixels[y0:y1, x0:x1][self.mask, :3] = shift(
+            self.hls, hue, saturation, lightness
+        )
+
+    def restore(self, pixels: numpy.ndarray) -> None:
+        x0, y0, x1, y1 = self.box
+        pixels[y0:y1, x0:x1] = self.original
+
+
+class RecolorTool(tkinter.ttk.LabelFrame):
+    def __init__(
+        self,
+        *args,
+        get_color: callable = None,
+        command: callable = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, text="Recolour", **kwargs)
+
+        # get_color returns the rgb to match, command runs once a change is kept
+        self.get_color = get_color
+        self.command = command
+
+        self.view = None
+        self.history = None
+        self.selection = None
+        self.pending = None
+
+        self.layer = tkinter.StringVar(self, "Both")
+        self.part = tkinter.StringVar(self, "All")
+        self.match_color = tkinter.IntVar(self, 0)
+        self.tolerance = tkinter.DoubleVar(self, 32)
+        self.hue = tkinter.DoubleVar(self, 0)
+        self.saturation = tkinter.DoubleVar(self, 0)
+        self.lightness = tkinter.DoubleVar(self, 0)
+
+        tkinter.ttk.Label(self, text="Layer:").grid(row=0, column=0, sticky="w")
+        layer = tkinter.ttk.Combobox(
+            self,
+            textvariable=self.layer,
+            values=list(LAYERS),
+            state="readonly",
+            width=10,
+        )
+        layer.grid(row=0, column=1, sticky="ew", pady=2)
+        layer.bind("<<ComboboxSelected>>", self.reselect)
+
+        tkinter.ttk.Label(self, text="Part:").grid(row=1, column=0, sticky="w")
+        part = tkinter.ttk.Combobox(
+            self,
+            textvariable=self.part,
+            values=list(PARTS),
+            state="readonly",
+            width=10,
+        )
+        part.grid(row=1, column=1, sticky="ew", pady=2)
+        part.bind("<<ComboboxSelected>>", self.reselect)
+
+        tkinter.ttk.Checkbutton(
+            self,
+            text="Match colour",
+            variable=self.match_color,
+            command=self.reselect,
+        ).grid(row=2, column=0, columnspan=2, sticky="w")
+
+        for row, (text, var, limit, command) in enumerate(
+            (
+                ("Tolerance:", self.tolerance, (0, 255), self.reselect),
+                ("Hue:", self.hue, (-180, 180), self.schedule_preview),
+                ("Saturation:", self.saturation, (-100, 100), self.schedule_preview),
+                ("Lightness:", self.lightness, (-100, 100), self.schedule_preview),
+            ),
+            3,
+        ):
+            tkinter.ttk.Label(self, text=text).grid(row=row, column=0, sticky="w")
+            tkinter.ttk.Scale(
+                self, from_=limit[0], to=limit[1], variable=var, command=command
+            ).grid(row=row, column=1, sticky="ew", pady=2)
+
+        buttons = tkinter.ttk.Frame(self)
+        buttons.grid(row=7, column=0, columnspan=2, pady=5)
+        tkinter.ttk.Button(buttons, text="Reset", command=self.reset).pack(side="left")
+        tkinter.ttk.Button(buttons, text="Apply", command=self.apply).pack(
+            side="left", padx=10
+        )
+
+    @property
+    def shifts(self) -> tuple:
+        return (
+            self.hue.get() / 360,
+            self.saturation.get() / 100,
+            self.lightness.get() / 100,
+        )
+
+    def set_target(self, view: skin.SkinView, actions: history.History) -> None:
+        # a preview left on the previous tab is kept
+        if view is not self.view:
+            self.apply()
+            self.view = view
+            self.history = actions
+
+    def select(self) -> None:
+        rgb = None
+        if self.match_color.get() and self.get_color is not None:
+            rgb = self.get_color()
+
+        self.view.own_skin()
+        pixels = self.view.skin_img
+        mask = select(
+            pixels,
+            self.view.slim,
+            LAYERS[self.layer.get()],
+            PARTS[self.part.get()],
+            rgb,
+            self.tolerance.get(),
+        )
+        if mask.any():
+            self.selection = Selection(pixels, mask)
+            self.history.touch(pixels, *self.selection.box)
+
+    def reselect(self, *_) -> None:
+        # the filters changed, start again from the original texels
+        if self.selection is not None:
+            self.selection.restore(self.view.skin_img)
+            self.view.update_skin(*self.selection.box)
+            self.selection = None
+
+        self.schedule_preview()
+
+    def schedule_preview(self, *_) -> None:
+        # slider motion is coalesced into one recolour per idle
+        if self.pending is None:
+            self.pending = self.after_idle(self.preview)
+
+    def preview(self) -> None:
+        self.pending = None
+        if self.view is None:
+            return
+
+        if self.selection is None:
+            if not any(self.shifts):
+                return
+
+            self.select()
+            if self.selection is None:
+                return
+
+        self.selection.preview(self.view.skin_img, *self.shifts)
+        self.view.update_skin(*self.selection.box)
+
+    def clear(self) -> None:
+        self.selection = None
+        self.hue.set(0)
+        self.saturation.set(0)
+        self.lightness.set(0)
+
+    def apply(self) -> None:
+        # keep the previewed colours as one undo step
+        if self.pending is not None:
+            self.after_cancel(self.pending)
+            self.preview()
+
+        if self.selection is not None:
+            self.history.commit(self.view.skin_img)
+            self.clear()
+            if self.command is not None:
+                self.command()
+
+    def reset(self) -> None:
+        if self.pending is not None:
+            self.after_cancel(self.pending)
+            self.pending = None
+
+        if self.selection is not None:
+            self.selection.restore(self.view.skin_img)
+            self.view.update_skin(*self.selection.box)
+            self.history.commit(self.view.skin_img)
+
+        self.clear()
+
+    def destroy(self) -> None:
+        if self.pending is not None:
+            self.after_cancel(self.pending)
+            self.pending = None
+
+        super().destroy()
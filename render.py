@@ -0,0 +1,222 @@
+import argparse
+import concurrent.futures
+import os
+import pathlib
+
+import camera
+import model
+import texture
+import transform
+
+import numpy
+import PIL.Image
+
+
+def load_texture(img: PIL.Image.Image) -> numpy.ndarray:
+    try:
+        return numpy.asarray(img.convert("RGBA"), numpy.float32) / 255
+
+    finally:
+        img.close()
+
+
+def draw_face(
+    color: numpy.ndarray,
+    depth: numpy.ndarray,
+    corners: numpy.ndarray,
+    uvs: numpy.ndarray,
+    texture: numpy.ndarray,
+    opaque: bool = False,
+) -> None:
+    # faces stay parallelograms under orthographic projection, so every pixel
+    # is located by its (s, t) coordinates along the two edges meeting at corner 1
+    height, width = depth.shape
+    x0 = max(0, int(corners[:, 0].min()))
+    x1 = min(width, int(numpy.ceil(corners[:, 0].max())))
+    y0 = max(0, int(corners[:, 1].min()))
+    y1 = min(height, int(numpy.ceil(corners[:, 1].max())))
+    if x0 >= x1 or y0 >= y1:
+        return
+
+    edge_s = corners[2] - corners[1]
+    edge_t = corners[0] - corners[1]
+    det = edge_s[0] * edge_t[1] - edge_s[1] * edge_t[0]
+    if abs(det) < 1e-6:
+        return
+
+    py, px = numpy.mgrid[y0:y1, x0:x1] + 0.5
+    dx = px - corners[1, 0]
+    dy = py - corners[1, 1]
+    s = (dx * edge_t[1] - dy * edge_t[0]) / det
+    t = (edge_s[0] * dy - edge_s[1] * dx) / det
+    inside = (s >= 0) & (s < 1) & (t >= 0) & (t < 1)
+
+    z = corners[1, 2] + s * edge_s[2] + t * edge_t[2]
+    s = numpy.clip(s, 0, 0.9999)
+    t = numpy.clip(t, 0, 0.9999)
+    u = uvs[1, 0] + s * (uvs[2, 0] - uvs[1, 0]) + t * (uvs[0, 0] - uvs[1, 0])
+    v = uvs[1, 1] + s * (uvs[2, 1] - uvs[1, 1]) + t * (uvs[0, 1] - uvs[1, 1])
+    tex_h, tex_w = texture.shape[:2]
+    texel = texture[
+        numpy.clip((v * tex_h).astype(int), 0, tex_h - 1),
+        numpy.clip((u * tex_w).astype(int), 0, tex_w - 1),
+    ]
+    if opaque:
+        # the cape and base layer ignore alpha like SkinView's shader
+        texel[..., 3] = 1
+
+    # alpha test, depth test, then blend like the gl overlay pass
+    region = (slice(y0, y1), slice(x0, x1))
+    mask = inside & (texel[..., 3] > 0) & (z > depth[region])
+    if not mask.any():
+        return
+
+    src = texel[mask]
+    dst = color[region][mask]
+    alpha = src[:, 3:]
+    out = numpy.empty_like(src)
+    out[:, :3] = src[:, :3] * alpha + dst[:, :3] * (1 - alpha)
+    out[:, 3:] = alpha + dst[:, 3:] * (1 - alpha)
+    color[region][mask] = out
+    depth[region][mask] = z[mask]
+
+
+def draw_box(
+    color: numpy.ndarray,
+    depth: numpy.ndarray,
+    box: model.Box,
+    matrix: numpy.ndarray,
+    texture: numpy.ndarray,
+    opaque: bool = False,
+) -> None:
+    corners = box.array[:, 2:] @ (matrix @ box.matrix(False)).T
+    centre = matrix @ box.matrix(False) @ numpy.array([0, 0, 0, 1], numpy.float32)
+    for face in range(len(box.quads)):
+        points = corners[face * 4 : face * 4 + 4, :3]
+
+        # only faces pointing towards the camera can be seen
+        if points.mean(axis=0)[2] <= centre[2]:
+            continue
+
+        draw_face(
+            color, depth, points, box.array[face * 4 : face * 4 + 4], texture, opaque
+        )
+
+
+def render(
+    skin_img: PIL.Image.Image,
+    slim: bool,
+    cape_img: PIL.Image.Image = None,
+    size: int = 128,
+    rot_x: float = transform.ISOMETRIC_ROT_X,
+    rot_y: float = transform.ISOMETRIC_ROT_Y,
+    show: dict = {},
+    background_color: tuple = None,
+    antialias: int = 2,
+) -> PIL.Image.Image:
+    parts = model.get_model(slim)
+    skin = texture.convert_legacy(load_texture(skin_img))
+    cape = None if cape_img is None else texture.pad_cape(load_texture(cape_img))
+
+    visible = {name: True for name in parts.overlays}
+    visible.update(show)
+
+    # same camera as SkinView, fitted so every thumbnail shares one scale
+    view = camera.Camera(rot_x=rot_x, rot_y=rot_y).orbit
+    boxes = list(parts.base.values()) + list(parts.overlays.values())
+    bounds = numpy.concatenate(
+        [box.array[:, 2:] @ (view @ box.matrix(False)).T for box in boxes]
+    )
+    low = bounds[:, :2].min(axis=0)
+    high = bounds[:, :2].max(axis=0)
+    pixels = size * antialias
+    scale = 0.9 * pixels / (high - low).max()
+    centre = (low + high) / 2
+    screen = (
+        transform.translate(pixels / 2, pixels / 2, 0)
+        @ transform.scale(scale, -scale, scale)
+        @ transform.translate(-centre[0], -centre[1], 0)
+        @ view
+    )
+
+    color = numpy.zeros((pixels, pixels, 4), numpy.float32)
+    if background_color is not None:
+        color[...] = (*background_color, 1)
+
+    depth = numpy.full((pixels, pixels), -numpy.inf, numpy.float32)
+
+    if cape is not None and visible.get("cape", True):
+        draw_box(color, depth, parts.cape, screen, cape, True)
+
+    for box in parts.base.values():
+        draw_box(color, depth, box, screen, skin, True)
+
+    for name, box in parts.overlays.items():
+        if visible[name]:
+            draw_box(color, depth, box, screen, skin)
+
+    img = PIL.Image.fromarray(numpy.round(color * 255).astype(numpy.uint8), "RGBA")
+    if antialias > 1:
+        img = img.resize((size, size), PIL.Image.Resampling.BOX)
+
+    return img
+
+
+def render_job(job: tuple) -> PIL.Image.Image:
+    skin_img, slim, kwargs = job
+    return render(skin_img, slim, **kwargs)
+
+
+def render_file(job: tuple) -> str:
+    path, output, slim, kwargs = job
+    render(PIL.Image.open(path), slim, **kwargs).save(output)
+    return output
+
+
+def chunk_size(jobs: int, processes: int = None) -> int:
+    return max(1, jobs // (4 * (processes or os.cpu_count() or 1)))
+
+
+def render_batch(
+    skins: list, slim: bool = False, processes: int = None, **kwargs
+) -> list:
+    # skins are PIL images or (image, slim) pairs
+    jobs = [
+        (skin, slim, kwargs) if isinstance(skin, PIL.Image.Image) else (*skin, kwargs)
+        for skin in skins
+    ]
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        return list(
+            executor.map(render_job, jobs, chunksize=chunk_size(len(jobs), processes))
+        )
+
+
+def render_files(
+    paths: list, output: str, slim: bool = False, processes: int = None, **kwargs
+) -> list:
+    output = pathlib.Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    jobs = [
+        (str(path), str(output / f"{pathlib.Path(path).stem}.png"), slim, kwargs)
+        for path in paths
+    ]
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        return list(
+            executor.map(render_file, jobs, chunksize=chunk_size(len(jobs), processes))
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render skins to thumbnails")
+    parser.add_argument("skins", nargs="+")
+    parser.add_argument("-o", "--output", default="thumbnails")
+    parser.add_argument("-s", "--size", type=int, default=128)
+    parser.add_argument("-j", "--processes", type=int)
+    parser.add_argument("--slim", action="store_true")
+    args = parser.parse_args()
+
+    paths = []
+    for path in map(pathlib.Path, args.skins):
+        paths += sorted(path.rglob("*.png")) if path.is_dir() else [path]
+
+    render_files(paths, args.output, args.slim, args.processes, size=args.size)
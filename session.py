@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import zipfile
+
+import numpy
+import PIL.Image
+
+SESSION_PATH = "session.zip"
+
+
+def encode_png(pixels: numpy.ndarray) -> bytes:
+    # png is already deflated, so a fast level keeps saving on close quick
+    fp = io.BytesIO()
+    PIL.Image.fromarray(pixels, "RGBA").save(fp, "png", compress_level=1)
+    return fp.getvalue()
+
+
+def decode_png(data: bytes) -> PIL.Image.Image:
+    return PIL.Image.open(io.BytesIO(data))
+
+
+def save(path: str, tabs: list, selected: int = None) -> None:
+    # each tab is a dict of json values plus "skin" and "cape" png bytes
+    entries = []
+    tmp = f"{path}.tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED) as zf:
+        for i, tab in enumerate(tabs):
+            entry = {k: v for k, v in tab.items() if k not in ("skin", "cape")}
+            for key in ("skin", "cape"):
+                if tab.get(key) is None:
+                    entry[key] = None
+
+                else:
+                    entry[key] = f"{i}/{key}.png"
+                    zf.writestr(entry[key], tab[key])
+
+            entries.append(entry)
+
+        zf.writestr(
+            "session.json",
+            json.dumps({"selected": selected, "tabs": entries}, indent=2),
+            zipfile.ZIP_DEFLATED,
+        )
+
+    # replace the previous session only once the new one is complete
+    os.replace(tmp, path)
+
+
+def load(path: str) -> tuple:
+    # returns (tabs, selected) with png bytes left undecoded until needed
+    if not os.path.isfile(path):
+        return [], None
+
+    try:
+        with zipfile.ZipFile(path) as zf:
+            data = json.loads(zf.read("session.json"))
+            tabs = []
+            for entry in data["tabs"]:
+                tab = dict(entry)
+                for key in ("skin", "cape"):
+                    if entry.get(key) is not None:
+                        tab[key] = zf.read(entry[key])
+
+                tabs.append(tab)
+
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        return [], None
+
+    return tabs, data.get("selected")
@@ -1,257 +1,279 @@
+import ctypes
+import time
 import tkinter
 
+import animation
+import camera
+import model
+import stats
+import texture
+
 import numpy
 from OpenGL.GL import *
-from OpenGL.GLU import *
+from OpenGL.GL import shaders
 import PIL.Image
 import pyopengltk
 
+VERTEX_SHADER = """
+#version 330 core
+
+// cape, six base parts and six overlays
+#define PARTS 13
+
+layout(location = 0) in vec3 position;
+layout(location = 1) in vec2 uv;
+layout(location = 2) in float part;
+
+uniform mat4 projection;
+uniform mat4 view;
+uniform mat4 parts[PARTS];
+uniform bool visible[PARTS];
+
+out vec2 texcoord;
+flat out int layer;
+
+void main() {
+    layer = int(part);
+    texcoord = uv;
+    if (visible[layer]) {
+        gl_Position = projection * view * parts[layer] * vec4(position, 1);
+    } else {
+        // hidden parts are pushed outside the clip volume
+        gl_Position = vec4(2, 2, 2, 1);
+    }
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330 core
+
+#define FIRST_OVERLAY 7
+
+uniform sampler2D skin;
+uniform sampler2D cape;
+uniform bool outline;
+
+in vec2 texcoord;
+flat in int layer;
+out vec4 color;
+
+void main() {
+    if (outline) {
+        color = vec4(1);
+    } else if (layer == 0) {
+        color = vec4(texture(cape, texcoord).rgb, 1);
+    } else if (layer < FIRST_OVERLAY) {
+        color = vec4(texture(skin, texcoord).rgb, 1);
+    } else {
+        color = texture(skin, texcoord);
+        if (color.a == 0) {
+            discard;
+        }
+    }
+}
+"""
+
+
+class MeshCache:
+    def __init__(self, frame_stats: stats.FrameStats) -> None:
+        self.meshes = {}
+        self.stats = frame_stats
+
+    def get(self, parts: model.Model) -> tuple:
+        # surfaces and grid lines of a model share one vertex array
+        if parts not in self.meshes:
+            vertices, ranges = parts.mesh()
+            vao = self.stats.gl(glGenVertexArrays, 1)
+            self.stats.gl(glBindVertexArray, vao)
+
+            buffer = self.stats.gl(glGenBuffers, 1)
+            self.stats.gl(glBindBuffer, GL_ARRAY_BUFFER, buffer)
+            self.stats.gl(
+                glBufferData, GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW
+            )
+            for location, size, offset in ((0, 3, 0), (1, 2, 12), (2, 1, 20)):
+                self.stats.gl(glEnableVertexAttribArray, location)
+                self.stats.gl(
+                    glVertexAttribPointer,
+                    location,
+                    size,
+                    GL_FLOAT,
+                    GL_FALSE,
+                    24,
+                    ctypes.c_void_p(offset),
+                )
 
-class Box:
-    def __init__(
-        self,
-        pos_x: float,
-        pos_y: float,
-        pos_z: float,
-        exp_x: float,
-        exp_y: float,
-        exp_z: float,
-        pix_x: float,
-        pix_y: float,
-        pix_z: float,
-        piv_x: float,
-        piv_y: float,
-        piv_z: float,
-        rot_x: float,
-        rot_y: float,
-        rot_z: float,
-        u: float,
-        v: float,
-        inc: float = 0,
-    ) -> None:
-        self.pos_x = pos_x
-        self.pos_y = pos_y
-        self.pos_z = pos_z
-
-        self.exp_x = exp_x
-        self.exp_y = exp_y
-        self.exp_z = exp_z
-
-        self.scl_x = pix_x + inc
-        self.scl_y = pix_y + inc
-        self.scl_z = pix_z + inc
-
-        self.piv_x = piv_x
-        self.piv_y = piv_y
-        self.piv_z = piv_z
-
-        self.rot_x = rot_x
-        self.rot_y = rot_y
-        self.rot_z = rot_z
-
-        self.vertices = (
-            numpy.array([-0.5, -0.5, 0.5, 1]),
-            numpy.array([-0.5, 0.5, 0.5, 1]),
-            numpy.array([0.5, 0.5, 0.5, 1]),
-            numpy.array([0.5, -0.5, 0.5, 1]),
-            numpy.array([0.5, -0.5, -0.5, 1]),
-            numpy.array([0.5, 0.5, -0.5, 1]),
-            numpy.array([-0.5, 0.5, -0.5, 1]),
-            numpy.array([-0.5, -0.5, -0.5, 1]),
+            self.stats.gl(glBindVertexArray, 0)
+            self.stats.gl(glBindBuffer, GL_ARRAY_BUFFER, 0)
+            self.meshes[parts] = (vao, buffer, ranges)
+
+        return self.meshes[parts]
+
+    def draw(self, parts: model.Model, mode: int, key: str) -> None:
+        vao, _, ranges = self.get(parts)
+        self.stats.gl(glBindVertexArray, vao)
+        self.stats.gl(glDrawArrays, mode, *ranges[key])
+        self.stats.gl(glBindVertexArray, 0)
+        self.stats.count(vertices=ranges[key][1])
+
+    def clear(self) -> None:
+        if self.meshes:
+            vaos, buffers, _ = zip(*self.meshes.values())
+            self.stats.gl(glDeleteVertexArrays, len(vaos), vaos)
+            self.stats.gl(glDeleteBuffers, len(buffers), buffers)
+
+        self.meshes.clear()
+
+
+class TextureCache:
+    def __init__(self, frame_stats: stats.FrameStats) -> None:
+        self.pending = {}
+        self.textures = {}
+        self.regions = {}
+        self.stats = frame_stats
+
+    def set(self, name: str, pixels: numpy.ndarray) -> None:
+        # upload is deferred until flush at the start of the next frame
+        self.pending[name] = pixels
+        self.regions.pop(name, None)
+
+    def discard(self, name: str) -> None:
+        self.pending[name] = None
+        self.regions.pop(name, None)
+
+    def update(self, name: str, x0: int, y0: int, x1: int, y1: int) -> None:
+        # a full upload is already queued, so regions only matter when resident
+        if name in self.textures and name not in self.pending:
+            self.regions.setdefault(name, []).append((x0, y0, x1, y1))
+
+    def flush(self) -> None:
+        # apply queued uploads and deletes, once per frame inside the gl context
+        # so discarded textures are freed even when nothing binds them again
+        for name, pixels in self.pending.items():
+            self.delete(name)
+            if pixels is not None:
+                self.upload(name, pixels)
+
+        self.pending.clear()
+
+    def bind(self, name: str) -> bool:
+        if name not in self.textures:
+            return False
+
+        self.stats.gl(glBindTexture, GL_TEXTURE_2D, self.textures[name][0])
+        if name in self.regions:
+            self.upload_regions(name, self.regions.pop(name))
+
+        return True
+
+    def upload(self, name: str, pixels: numpy.ndarray) -> None:
+        texture = self.stats.gl(glGenTextures, 1)
+        self.stats.gl(glBindTexture, GL_TEXTURE_2D, texture)
+        self.stats.gl(
+            glTexImage2D,
+            GL_TEXTURE_2D,
+            0,
+            GL_RGBA,
+            pixels.shape[1],
+            pixels.shape[0],
+            0,
+            GL_RGBA,
+            GL_UNSIGNED_BYTE,
+            pixels,
         )
 
-        # for
+        self.stats.gl(glTexParameter, GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP)
+        self.stats.gl(glTexParameter, GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP)
+        self.stats.gl(glTexParameter, GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        self.stats.gl(glTexParameter, GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
 
-        self.grid = []
+        self.textures[name] = (texture, pixels)
 
-        # grid lines wrapping x axis
-        for x in range(pix_x + 1):
-            # front
-            self.grid.append(
-                (
-                    self.vertices[0] + numpy.array([x / pix_x, 0, 0, 0]),
-                    self.vertices[1] + numpy.array([x / pix_x, 0, 0, 0]),
-                )
-            )
-            # back
-            self.grid.append(
-                (
-                    self.vertices[6] + numpy.array([x / pix_x, 0, 0, 0]),
-                    self.vertices[7] + numpy.array([x / pix_x, 0, 0, 0]),
-                )
-            )
-            # top
-            self.grid.append(
-                (
-                    self.vertices[1] + numpy.array([x / pix_x, 0, 0, 0]),
-                    self.vertices[6] + numpy.array([x / pix_x, 0, 0, 0]),
-                )
-            )
-            # bottom
-            self.grid.append(
-                (
-                    self.vertices[0] + numpy.array([x / pix_x, 0, 0, 0]),
-                    self.vertices[7] + numpy.array([x / pix_x, 0, 0, 0]),
-                )
-            )
+    def upload_regions(self, name: str, regions: list) -> None:
+        pixels = self.textures[name][1]
 
-        # grid lines wrapping y axis
-        for y in range(pix_y + 1):
-            # front
-            self.grid.append(
-                (
-                    self.vertices[0] + numpy.array([0, y / pix_y, 0, 0]),
-                    self.vertices[3] + numpy.array([0, y / pix_y, 0, 0]),
-                )
-            )
-            # back
-            self.grid.append(
-                (
-                    self.vertices[4] + numpy.array([0, y / pix_y, 0, 0]),
-                    self.vertices[7] + numpy.array([0, y / pix_y, 0, 0]),
-                )
-            )
-            # right
-            self.grid.append(
-                (
-                    self.vertices[0] + numpy.array([0, y / pix_y, 0, 0]),
-                    self.vertices[7] + numpy.array([0, y / pix_y, 0, 0]),
-                )
-            )
-            # left
-            self.grid.append(
-                (
-                    self.vertices[3] + numpy.array([0, y / pix_y, 0, 0]),
-                    self.vertices[4] + numpy.array([0, y / pix_y, 0, 0]),
-                )
-            )
+        # many small strokes are cheaper to send as their bounding box
+        if len(regions) > 16:
+            x0, y0, x1, y1 = zip(*regions)
+            regions = [(min(x0), min(y0), max(x1), max(y1))]
 
-        # grid lines wrapping z axis
-        for z in range(pix_z + 1):
-            # top
-            self.grid.append(
-                (
-                    self.vertices[5] + numpy.array([0, 0, z / pix_z, 0]),
-                    self.vertices[6] + numpy.array([0, 0, z / pix_z, 0]),
-                )
-            )
-            # bottom
-            self.grid.append(
-                (
-                    self.vertices[4] + numpy.array([0, 0, z / pix_z, 0]),
-                    self.vertices[7] + numpy.array([0, 0, z / pix_z, 0]),
-                )
-            )
-            # right
-            self.grid.append(
-                (
-                    self.vertices[6] + numpy.array([0, 0, z / pix_z, 0]),
-                    self.vertices[7] + numpy.array([0, 0, z / pix_z, 0]),
-                )
-            )
-            # left
-            self.grid.append(
-                (
-                    self.vertices[4] + numpy.array([0, 0, z / pix_z, 0]),
-                    self.vertices[5] + numpy.array([0, 0, z / pix_z, 0]),
-                )
+        # read each region straight out of the backing buffer without copying
+        self.stats.gl(glPixelStorei, GL_UNPACK_ROW_LENGTH, pixels.shape[1])
+        for x0, y0, x1, y1 in regions:
+            self.stats.gl(glPixelStorei, GL_UNPACK_SKIP_PIXELS, x0)
+            self.stats.gl(glPixelStorei, GL_UNPACK_SKIP_ROWS, y0)
+            self.stats.gl(
+                glTexSubImage2D,
+                GL_TEXTURE_2D,
+                0,
+                x0,
+                y0,
+                x1 - x0,
+                y1 - y0,
+                GL_RGBA,
+                GL_UNSIGNED_BYTE,
+                pixels,
             )
 
-        self.quads = (
-            (  # front
-                0,
-                1,
-                2,
-                3,
-                u + pix_z / 64,
-                v + (pix_y + pix_z) / 64,
-                u + pix_z / 64,
-                v + pix_z / 64,
-                u + (pix_x + pix_z) / 64,
-                v + pix_z / 64,
-                u + (pix_x + pix_z) / 64,
-                v + (pix_y + pix_z) / 64,
-            ),
-            (  # back
-                4,
-                5,
-                6,
-                7,
-                u + (2 * pix_z + pix_x) / 64,
-                v + (pix_y + pix_z) / 64,
-                u + (2 * pix_z + pix_x) / 64,
-                v + pix_z / 64,
-                u + (2 * pix_z + 2 * pix_x) / 64,
-                v + pix_z / 64,
-                u + (2 * pix_z + 2 * pix_x) / 64,
-                v + (pix_y + pix_z) / 64,
-            ),
-            (  # top
-                1,
-                6,
-                5,
-                2,
-                u + pix_z / 64,
-                v + pix_z / 64,
-                u + pix_z / 64,
-                v,
-                u + (pix_x + pix_z) / 64,
-                v,
-                u + (pix_x + pix_z) / 64,
-                v + pix_z / 64,
-            ),
-            (  # bottom
-                0,
-                7,
-                4,
-                3,
-                u + (pix_x + pix_z) / 64,
-                v + pix_z / 64,
-                u + (pix_x + pix_z) / 64,
-                v,
-                u + (2 * pix_x + pix_z) / 64,
-                v,
-                u + (2 * pix_x + pix_z) / 64,
-                v + pix_z / 64,
-            ),
-            (  # right
-                7,
-                6,
-                1,
-                0,
-                u,
-                v + (pix_y + pix_z) / 64,
-                u,
-                v + pix_z / 64,
-                u + pix_z / 64,
-                v + pix_z / 64,
-                u + pix_z / 64,
-                v + (pix_y + pix_z) / 64,
-            ),
-            (  # left
-                3,
-                2,
-                5,
-                4,
-                u + (pix_x + pix_z) / 64,
-                v + (pix_y + pix_z) / 64,
-                u + (pix_x + pix_z) / 64,
-                v + pix_z / 64,
-                u + (pix_x + 2 * pix_z) / 64,
-                v + pix_z / 64,
-                u + (pix_x + 2 * pix_z) / 64,
-                v + (pix_y + pix_z) / 64,
-            ),
-        )
+        self.stats.gl(glPixelStorei, GL_UNPACK_SKIP_ROWS, 0)
+        self.stats.gl(glPixelStorei, GL_UNPACK_SKIP_PIXELS, 0)
+        self.stats.gl(glPixelStorei, GL_UNPACK_ROW_LENGTH, 0)
+
+    def delete(self, name: str) -> None:
+        if name in self.textures:
+            self.stats.gl(glDeleteTextures, [self.textures.pop(name)[0]])
+
+    def clear(self) -> None:
+        for name in list(self.textures):
+            self.delete(name)
+
+        self.pending.clear()
+        self.regions.clear()
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(pixels.nbytes for _, pixels in self.textures.values())
+
+
+class OnDemandFrame(pyopengltk.OpenGLFrame):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        # frames are only rendered after something visible changed
+        self.dirty = True
+        self.pending = None
+        self.bind("<Map>", lambda _: self.mark_dirty(), add="+")
+        self.bind("<Configure>", lambda _: self.mark_dirty(), add="+")
 
+    def mark_dirty(self) -> None:
+        self.dirty = True
+        if self.pending is None:
+            self.pending = self.after_idle(self.render)
 
-class SkinView(pyopengltk.OpenGLFrame):
+    def render(self) -> None:
+        self.pending = None
+        # hidden notebook tabs are unmapped and skip rendering until shown again
+        if self.dirty and self.context_created and self.winfo_viewable():
+            self._display()
+
+    def redraw(self) -> None:
+        self.dirty = False
+
+    def destroy(self) -> None:
+        if self.pending is not None:
+            self.after_cancel(self.pending)
+            self.pending = None
+
+        super().destroy()
+
+
+class SkinView(OnDemandFrame):
     def __init__(
         self,
         *args,
         slim: bool,
-        skin_img: PIL.Image.Image,
-        cape_img: PIL.Image.Image = None,
+        skin_img: PIL.Image.Image | numpy.ndarray,
+        cape_img: PIL.Image.Image | numpy.ndarray = None,
         exploded: bool = False,
         grid: bool = False,
         dragable: bool = True,
@@ -267,7 +289,6 @@ class SkinView(pyopengltk.OpenGLFrame):
         super().__init__(*args, **kwargs)
 
         self.background_color = background_color
-        self.ortho = ortho
 
         self.exploded = exploded
         self.grid = grid
@@ -283,7 +304,17 @@ class SkinView(pyopengltk.OpenGLFrame):
         }
         self.show.update(show)
 
-        self.has_cape = cape_img is not None
+        self.stats = stats.FrameStats()
+        self.textures = TextureCache(self.stats)
+        self.meshes = MeshCache(self.stats)
+        self.program = None
+        self.uniforms = {}
+
+        # optional fps and timing readout drawn over the viewport
+        self.show_stats = False
+        self.stats_label = tkinter.Label(
+            self, justify="left", anchor="nw", font=("Consolas", 8)
+        )
 
         # layer visibility defaults
         self.show_cape = True
@@ -294,34 +325,11 @@ class SkinView(pyopengltk.OpenGLFrame):
         self.show_right_pants = True
         self.show_left_pants = True
 
-        self.skin_overlays = {
-            "hat": Box(0, 28, 0, 0, 33, 0, 8, 8, 8, 0, 24, 0, 0, 0, 0, 0.5, 0, 1),
-            "jacket": Box(
-                0, 18, 0, 0, 18, 0, 8, 12, 4, 0, 24, 0, 0, 0, 0, 0.25, 0.5, 0.5
-            ),
-            "right-pants": Box(
-                -2, 6, 0, -4.5, 1, 0, 4, 12, 4, -1.9, 12, 0, 0, 0, 0, 0, 0.5, 0.5
-            ),
-            "left-pants": Box(
-                2, 6, 0, 4.5, 1, 0, 4, 12, 4, 1.9, 12, 0, 0, 0, 0, 0, 0.75, 0.5
-            ),
-        }
-
-        self.cape = Box(
-            0, 16, -3.5, 0, 16, 1.5, 10, 16, 1, 0, 24, -3, -15, 180, 0, 0, 0
-        )
-
+        # bumped on every skin change so derived data such as palettes knows
+        # when to recompute
+        self.skin_version = 0
         self.set_skin(skin_img)
-
-        self.cape_img = cape_img
-        if self.has_cape:
-            try:
-                self.cape_img = cape_img.size + (
-                    numpy.array(list(cape_img.convert("RGBA").getdata()), numpy.uint8),
-                )
-
-            finally:
-                cape_img.close()
+        self.set_cape(cape_img)
 
         if dragable:
             self.bind("<Button-1>", self.set_pos)
@@ -335,413 +343,291 @@ class SkinView(pyopengltk.OpenGLFrame):
         self.move_speed = move_speed
         self.prev = [0, 0]
 
-        self.drag_x = 0
-        self.drag_y = 0
-        self.x_rot = rot_x
-        self.y_rot = rot_y
+        # resized to the frame before each redraw and pick
+        self.camera = camera.Camera(rot_x=rot_x, rot_y=rot_y, ortho=ortho)
 
-        self.zoom = 1
+        # pose animation, frames are only scheduled while one is playing
+        self.animator = None
+        self.animation_speed = 1
+        self.animation_start = 0
+        self.next_frame = None
+        self.matrices = None
 
-        self.move_x = 0
-        self.move_y = 0
-        self.x_off = 0
-        self.y_off = 0
+    def set_skin(self, skin_img: PIL.Image.Image | numpy.ndarray) -> None:
+        # the editor paints straight into this buffer and the gpu copy is
+        # refreshed from it one region at a time, read only arrays such as
+        # store buffers are shared until the first edit copies them
+        if isinstance(skin_img, numpy.ndarray):
+            self.skin_img = texture.convert_legacy(skin_img)
 
-        self.walk_speed = 20
+        else:
+            try:
+                self.skin_img = texture.convert_legacy(
+                    numpy.array(skin_img.convert("RGBA"), numpy.uint8)
+                )
 
-    def set_skin(self, skin_img: PIL.Image.Image) -> None:
-        try:
-            self.skin_img = skin_img.size + (
-                numpy.array(list(skin_img.convert("RGBA").getdata()), numpy.uint8),
-            )
+            finally:
+                skin_img.close()
+
+        self.textures.set("skin", self.skin_img)
+        self.skin_version += 1
+        self.mark_dirty()
+
+    def own_skin(self) -> None:
+        # call before writing to skin_img
+        if not self.skin_img.flags.writeable:
+            self.skin_img = self.skin_img.copy()
+            self.textures.set("skin", self.skin_img)
+
+    def set_cape(self, cape_img: PIL.Image.Image | numpy.ndarray = None) -> None:
+        self.has_cape = cape_img is not None
+        if isinstance(cape_img, numpy.ndarray):
+            self.cape_img = texture.pad_cape(cape_img)
+            self.textures.set("cape", self.cape_img)
+
+        elif self.has_cape:
+            try:
+                self.cape_img = texture.pad_cape(
+                    numpy.array(cape_img.convert("RGBA"), numpy.uint8)
+                )
+
+            finally:
+                cape_img.close()
+
+            self.textures.set("cape", self.cape_img)
+
+        else:
+            self.cape_img = None
+            self.textures.discard("cape")
+
+        self.mark_dirty()
+
+    def update_skin(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        # call after writing to skin_img[y0:y1, x0:x1]
+        height, width = self.skin_img.shape[:2]
+        x0, x1 = max(0, x0), min(width, x1)
+        y0, y1 = max(0, y0), min(height, y1)
+        if x0 < x1 and y0 < y1:
+            self.textures.update("skin", x0, y0, x1, y1)
+            self.skin_version += 1
+            self.mark_dirty()
+
+    def set_pixels(self, x: int, y: int, pixels: numpy.ndarray) -> None:
+        height, width = pixels.shape[:2]
+        self.own_skin()
+        self.skin_img[y : y + height, x : x + width] = pixels
+        self.update_skin(x, y, x + width, y + height)
+
+    def paint(self, x: int, y: int, color: tuple, size: int = 1) -> None:
+        # square brush centred on the texel, color is an rgba tuple
+        x0, y0 = x - size // 2, y - size // 2
+        self.own_skin()
+        self.skin_img[max(0, y0) : y0 + size, max(0, x0) : x0 + size] = color
+        self.update_skin(x0, y0, x0 + size, y0 + size)
+
+    @property
+    def texture_bytes(self) -> int:
+        return self.textures.resident_bytes
+
+    def set_animation(self, name: str = None, speed: float = None) -> None:
+        # name is a key of animation.ANIMATIONS, None returns to the rest pose
+        if speed is not None:
+            self.animation_speed = speed
+
+        if name is None:
+            self.animator = None
+
+        elif self.animator is None or self.animator.name != name:
+            self.animator = animation.Animator(name, self.animation_speed)
+            self.animation_start = time.perf_counter()
+
+        else:
+            self.animator.speed = self.animation_speed
+
+        self.mark_dirty()
+
+    def destroy(self) -> None:
+        if self.next_frame is not None:
+            self.after_cancel(self.next_frame)
+            self.next_frame = None
+
+        # release textures, meshes and the shader while the context is still alive
+        if self.context_created and self.winfo_ismapped():
+            self.tkMakeCurrent()
+            self.textures.clear()
+            self.meshes.clear()
+            if self.program is not None:
+                glDeleteProgram(self.program)
 
-        finally:
-            skin_img.close()
+        super().destroy()
 
     def set_pos(self, event: tkinter.Event) -> None:
         self.prev = [event.x, event.y]
 
     def drag(self, event: tkinter.Event) -> None:
-        self.drag_x = event.x - self.prev[0]
-        self.drag_y = event.y - self.prev[1]
+        self.camera.rotate(
+            (event.y - self.prev[1]) * self.drag_speed,
+            (event.x - self.prev[0]) * self.drag_speed,
+        )
         self.prev = [event.x, event.y]
+        self.mark_dirty()
 
     def scroll(self, event: tkinter.Event) -> None:
-        self.zoom += event.delta / 800
-        self.zoom = min(5, max(0.25, self.zoom))
+        self.camera.zoom_by(event.delta / 800)
+        self.mark_dirty()
 
     def move(self, event: tkinter.Event) -> None:
-        self.move_x = event.x - self.prev[0]
-        self.move_y = event.y - self.prev[1]
+        self.camera.pan(
+            (event.y - self.prev[1]) * self.move_speed,
+            (event.x - self.prev[0]) * self.move_speed,
+        )
         self.prev = [event.x, event.y]
+        self.mark_dirty()
+
+    @property
+    def ortho(self) -> bool:
+        return self.camera.ortho
+
+    @ortho.setter
+    def ortho(self, ortho: bool) -> None:
+        self.camera.set_ortho(ortho)
+
+    def pick(self, x: int, y: int) -> tuple:
+        # returns (part, layer, face, (u, v) texel) under a window position
+        self.camera.resize(self.width, self.height)
+        hit = model.get_model(self.slim).pick(
+            *self.camera.ray(x, y),
+            self.exploded,
+            self.show,
+            self.has_cape and self.show_cape,
+            self.matrices if self.animator is not None else None,
+            self.skin_img,
+        )
+        if hit is None:
+            return None
+
+        name, layer, face, (u, v) = hit
+        pixels = self.cape_img if layer == "cape" else self.skin_img
+        height, width = pixels.shape[:2]
+        texel = (min(int(u * width), width - 1), min(int(v * height), height - 1))
+        return name, layer, face, texel
 
     def initgl(self) -> None:
-        glEnable(GL_TEXTURE_2D)
         glEnable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        if self.program is not None:
+            return
 
-    def redraw(self) -> None:
-        glViewport(0, 0, self.width, self.height)
-
-        self.textures = glGenTextures(2)
-
-        # skin texture
-        glBindTexture(GL_TEXTURE_2D, self.textures[0])
-        glTexImage2D(
-            GL_TEXTURE_2D,
-            0,
-            GL_RGBA,
-            *self.skin_img[:2],
-            0,
-            GL_RGBA,
-            GL_UNSIGNED_BYTE,
-            self.skin_img[-1],
+        self.program = shaders.compileProgram(
+            shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
         )
+        self.uniforms = {
+            name: glGetUniformLocation(self.program, name)
+            for name in ("projection", "view", "parts", "visible", "outline")
+        }
 
-        glTexParameter(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP)
-        glTexParameter(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP)
-        glTexParameter(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
-        glTexParameter(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        # the skin is sampled from unit 0 and the cape from unit 1
+        glUseProgram(self.program)
+        glUniform1i(glGetUniformLocation(self.program, "skin"), 0)
+        glUniform1i(glGetUniformLocation(self.program, "cape"), 1)
+        glUseProgram(0)
 
-        if self.cape_img is not None:
-            # cape texture
-            glBindTexture(GL_TEXTURE_2D, self.textures[1])
+    def redraw(self) -> None:
+        super().redraw()
+        self.stats.begin()
+        self.stats.gl(glViewport, 0, 0, self.width, self.height)
 
-            glTexImage2D(
-                GL_TEXTURE_2D,
-                0,
-                GL_RGBA,
-                *self.cape_img[:2],
-                0,
-                GL_RGBA,
-                GL_UNSIGNED_BYTE,
-                self.cape_img[-1],
-            )
+        if self.background_color is None:
+            self.stats.gl(glClearColor, 1, 1, 1, 0)
 
-            glTexParameter(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP)
-            glTexParameter(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP)
-            glTexParameter(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
-            glTexParameter(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-
-        self.skin = {
-            "hat": Box(0, 28, 0, 0, 33, 0, 8, 8, 8, 0, 24, 0, 0, 0, 0, 0, 0),
-            "jacket": Box(0, 18, 0, 0, 18, 0, 8, 12, 4, 0, 24, 0, 0, 0, 0, 0.25, 0.25),
-            "right-pants": Box(
-                -2, 6, 0, -4.5, 1, 0, 4, 12, 4, -1.9, 12, 0, 0, 0, 0, 0, 0.25
-            ),
-            "left-pants": Box(
-                2, 6, 0, 4.5, 1, 0, 4, 12, 4, 1.9, 12, 0, 0, 0, 0, 0.25, 0.75
-            ),
-        }
+        else:
+            self.stats.gl(glClearColor, *self.background_color, 0)
 
-        if self.slim:
-            self.skin.update(
-                {
-                    "right-sleeve": Box(
-                        -5.5,
-                        18,
-                        0,
-                        -10.5,
-                        18,
-                        0,
-                        3,
-                        12,
-                        4,
-                        -5,
-                        21.5,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0.625,
-                        0.25,
-                    ),
-                    "left-sleeve": Box(
-                        5.5,
-                        18,
-                        0,
-                        10.5,
-                        18,
-                        0,
-                        3,
-                        12,
-                        4,
-                        5,
-                        21.5,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0.5,
-                        0.75,
-                    ),
-                }
-            )
+        # clear frame
+        self.stats.gl(glClear, GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
-            self.skin_overlays.update(
-                {
-                    "right-sleeve": Box(
-                        -5.5,
-                        18,
-                        0,
-                        -10.5,
-                        18,
-                        0,
-                        3,
-                        12,
-                        4,
-                        -5,
-                        21.5,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0.625,
-                        0.5,
-                        0.5,
-                    ),
-                    "left-sleeve": Box(
-                        5.5,
-                        18,
-                        0,
-                        10.5,
-                        18,
-                        0,
-                        3,
-                        12,
-                        4,
-                        5,
-                        21.5,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0.75,
-                        0.75,
-                        0.5,
-                    ),
-                }
-            )
+        # camera and every part's placement are uploaded once per frame
+        parts = model.get_model(self.slim)
+        if self.animator is None:
+            matrices = parts.part_matrices(self.exploded)
 
         else:
-            self.skin.update(
-                {
-                    # arms
-                    "right-sleeve": Box(
-                        -6, 18, 0, -11, 18, 0, 4, 12, 4, -5, 22, 0, 0, 0, 0, 0.625, 0.25
-                    ),
-                    "left-sleeve": Box(
-                        6, 18, 0, 11, 18, 0, 4, 12, 4, 5, 22, 0, 0, 0, 0, 0.5, 0.75
-                    ),
-                }
+            matrices = self.animator.matrices(
+                parts, self.exploded, time.perf_counter() - self.animation_start
             )
 
-            self.skin_overlays.update(
-                {
-                    "right-sleeve": Box(
-                        -6,
-                        18,
-                        0,
-                        -11,
-                        18,
-                        0,
-                        4,
-                        12,
-                        4,
-                        -5,
-                        22,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0.625,
-                        0.5,
-                        0.5,
-                    ),
-                    "left-sleeve": Box(
-                        6,
-                        18,
-                        0,
-                        11,
-                        18,
-                        0,
-                        4,
-                        12,
-                        4,
-                        5,
-                        22,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0.75,
-                        0.75,
-                        0.5,
-                    ),
-                }
+        self.matrices = matrices
+        self.camera.resize(self.width, self.height)
+        self.stats.gl(glUseProgram, self.program)
+        self.stats.gl(
+            glUniformMatrix4fv,
+            self.uniforms["projection"],
+            1,
+            GL_TRUE,
+            self.camera.projection,
+        )
+        self.stats.gl(
+            glUniformMatrix4fv, self.uniforms["view"], 1, GL_TRUE, self.camera.view
+        )
+        self.stats.gl(
+            glUniformMatrix4fv, self.uniforms["parts"], len(matrices), GL_TRUE, matrices
+        )
+        self.stats.mark("setup")
+
+        self.textures.flush()
+        self.stats.gl(glActiveTexture, GL_TEXTURE1)
+        cape = self.has_cape and self.show_cape and self.textures.bind("cape")
+        self.stats.gl(glActiveTexture, GL_TEXTURE0)
+        self.textures.bind("skin")
+        self.stats.mark("textures")
+
+        # cape, base and overlays in one draw, overlays come last in the buffer
+        # so they blend over the base layer
+        visible = parts.visibility(self.show, cape).astype(numpy.int32)
+        self.stats.gl(glUniform1iv, self.uniforms["visible"], len(visible), visible)
+        self.stats.gl(glUniform1i, self.uniforms["outline"], 0)
+        self.meshes.draw(parts, GL_TRIANGLES, "surfaces")
+        self.stats.mark("surfaces")
+
+        # render grid lines of every visible layer in a single draw
+        if self.grid:
+            outlined = parts.outlined(self.show).astype(numpy.int32)
+            self.stats.gl(
+                glUniform1iv, self.uniforms["visible"], len(outlined), outlined
+            )
+            self.stats.gl(glUniform1i, self.uniforms["outline"], 1)
+            self.meshes.draw(parts, GL_LINES, "grid")
+
+        self.stats.gl(glUseProgram, 0)
+        self.stats.mark("grid")
+        if self.stats.sync:
+            self.stats.gl(glFinish)
+            self.stats.mark("finish")
+
+        self.stats.end()
+        if self.show_stats:
+            self.stats_label.config(text=self.stats.text())
+
+        # keep drawing while animated, hidden views stop until mapped again
+        if self.animator is not None and self.next_frame is None:
+            self.next_frame = self.after(
+                animation.FRAME_TIME, self.next_animation_frame
             )
 
-        if self.background_color is None:
-            glClearColor(1, 1, 1, 0)
+    def next_animation_frame(self) -> None:
+        self.next_frame = None
+        if self.animator is not None:
+            self.mark_dirty()
 
-        else:
-            glClearColor(*self.background_color, 0)
-
-        # setup projection
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-
-        if self.ortho:
-            glOrtho(
-                -self.width / 15,
-                self.width / 15,
-                -self.height / 15,
-                self.height / 15,
-                -100,
-                250,
-            )
+    def set_show_stats(self, show: bool) -> None:
+        # while shown, frames wait for the gpu so its share appears as "finish"
+        self.show_stats = show
+        self.stats.sync = bool(show)
+        if show:
+            self.stats_label.config(text=self.stats.text())
+            self.stats_label.place(x=4, y=4)
 
         else:
-            gluPerspective(60, self.width / self.height, 0.1, 250)
-
-        glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
-
-        # move camera and apply controls
-        self.y_rot += self.drag_x * self.drag_speed
-        self.x_rot += self.drag_y * self.drag_speed
-        self.x_rot = min(90, max(self.x_rot, -90))  # clamp x rotation
-        self.drag_x = 0
-        self.drag_y = 0
-
-        self.y_off += self.move_x * self.move_speed
-        self.x_off += self.move_y * self.move_speed
-        self.move_x = 0
-        self.move_y = 0
-
-        glTranslatef(0, 0, -50)
-        glTranslatef(self.y_off, -self.x_off, 0)
-        glRotatef(self.x_rot, 1, 0, 0)
-        glRotatef(self.y_rot, 0, 1, 0)
-        glScalef(self.zoom, self.zoom, self.zoom)
-        glTranslatef(0, -18, 0)
-
-        # clear frame
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-
-        # get mouse vector
-        proj = glGetFloatv(GL_PROJECTION_MATRIX)
-        x = 2 * self.prev[0] / self.width - 1
-        y = 1 - 2 * self.prev[1] / self.width
-        ray_eye = numpy.linalg.inv(proj) @ numpy.array([x, y, -1, 1])
-        ray_eye /= numpy.linalg.norm(ray_eye[:3])
-        ray_eye[3] = 1
-        view = glGetFloatv(GL_MODELVIEW_MATRIX)
-        ray_world = (numpy.linalg.inv(view) @ ray_eye)[:3]
-        ray_world /= numpy.linalg.norm(ray_world)
-
-        # render cape
-        if self.has_cape and self.show_cape:
-            glBindTexture(GL_TEXTURE_2D, self.textures[1])
-            glPushMatrix()
-            glTranslatef(self.cape.piv_x, self.cape.piv_y, self.cape.piv_z)
-            glRotatef(self.cape.rot_z, 0, 0, 1)
-            glRotatef(self.cape.rot_y, 0, 1, 0)
-            glRotatef(self.cape.rot_x, 1, 0, 0)
-            glTranslatef(-self.cape.piv_x, -self.cape.piv_y, -self.cape.piv_z)
-            if self.exploded:
-                glTranslatef(self.cape.exp_x, self.cape.exp_y, self.cape.exp_z)
-
-            else:
-                glTranslatef(self.cape.pos_x, self.cape.pos_y, self.cape.pos_z)
-
-            glScalef(self.cape.scl_x, self.cape.scl_y, self.cape.scl_z)
-            glBegin(GL_QUADS)
-            for face in self.cape.quads:
-                for i in range(4):
-                    glTexCoord2f(face[i * 2 + 4], face[i * 2 + 5] * 2)
-                    glVertex4fv((self.cape.vertices[face[i]]))
-
-            glEnd()
-            glPopMatrix()
-
-        glBindTexture(GL_TEXTURE_2D, self.textures[0])
-
-        # render skin
-        for overlay, box in self.skin.items():
-            glPushMatrix()
-            glTranslatef(box.piv_x, box.piv_y, box.piv_z)
-            glRotatef(box.rot_z, 0, 0, 1)
-            glRotatef(box.rot_y, 0, 1, 0)
-            glRotatef(box.rot_x, 1, 0, 0)
-            glTranslatef(-box.piv_x, -box.piv_y, -box.piv_z)
-            if self.exploded:
-                glTranslatef(box.exp_x, box.exp_y, box.exp_z)
-
-            else:
-                glTranslatef(box.pos_x, box.pos_y, box.pos_z)
-
-            glScalef(box.scl_x, box.scl_y, box.scl_z)
-            glBegin(GL_QUADS)
-            for face in box.quads:
-                for i in range(4):
-                    glTexCoord2f(face[i * 2 + 4], face[i * 2 + 5])
-                    glVertex4fv((box.vertices[face[i]]))
-
-            glEnd()
-            if self.grid and not self.show[overlay]:
-                glScalef(1.001, 1.001, 1.001)
-                glDisable(GL_TEXTURE_2D)
-                glColor3f(1, 1, 1)
-                glBegin(GL_LINES)
-                for line in box.grid:
-                    glVertex4fv(line[0])
-                    glVertex4fv(line[1])
-
-                glEnd()
-                glEnable(GL_TEXTURE_2D)
-
-            glPopMatrix()
-
-        # render overlays
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-        glAlphaFunc(GL_NOTEQUAL, 0)
-        glEnable(GL_ALPHA_TEST)
-        for section, box in self.skin_overlays.items():
-            if section in self.show and self.show[section]:
-                glPushMatrix()
-                glTranslatef(box.piv_x, box.piv_y, box.piv_z)
-                glRotatef(box.rot_z, 0, 0, 1)
-                glRotatef(box.rot_y, 0, 1, 0)
-                glRotatef(box.rot_x, 1, 0, 0)
-                glTranslatef(-box.piv_x, -box.piv_y, -box.piv_z)
-                if self.exploded:
-                    glTranslatef(box.exp_x, box.exp_y, box.exp_z)
-
-                else:
-                    glTranslatef(box.pos_x, box.pos_y, box.pos_z)
-
-                glScalef(box.scl_x, box.scl_y, box.scl_z)
-                glBegin(GL_QUADS)
-                for face in box.quads:
-                    for i in range(4):
-                        glTexCoord2f(face[i * 2 + 4], face[i * 2 + 5])
-                        glVertex4fv((box.vertices[face[i]]))
-
-                glEnd()
-                if self.grid:
-                    glScalef(1.001, 1.001, 1.001)
-                    glDisable(GL_TEXTURE_2D)
-                    glColor3f(1, 1, 1)
-                    glBegin(GL_LINES)
-                    for line in box.grid:
-                        glVertex4fv(line[0])
-                        glVertex4fv(line[1])
-
-                    glEnd()
-                    glEnable(GL_TEXTURE_2D)
-
-                glPopMatrix()
-
-        glDisable(GL_ALPHA_TEST)
-        glDisable(GL_BLEND)
+            self.stats_label.place_forget()
@@ -0,0 +1,91 @@
+import collections
+import csv
+import time
+
+
+class FrameStats:
+    phases = ("setup", "textures", "surfaces", "grid", "finish")
+
+    def __init__(self, history: int = 600) -> None:
+        self.frames = collections.deque(maxlen=history)
+        self.calls = 0
+        self.vertices = 0
+        self.current = dict.fromkeys(self.phases, 0.0)
+        self.start = self.last = time.perf_counter()
+
+        # wait for the gpu at the end of each frame so its time shows up
+        self.sync = False
+
+    def begin(self) -> None:
+        self.calls = 0
+        self.vertices = 0
+        self.current = dict.fromkeys(self.phases, 0.0)
+        self.start = self.last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        # charge the time since the previous mark to a phase
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def count(self, calls: int = 0, vertices: int = 0) -> None:
+        self.calls += calls
+        self.vertices += vertices
+
+    def gl(self, function: callable, *args) -> object:
+        # make a gl call and count it, so counts cannot drift from the code
+        self.calls += 1
+        return function(*args)
+
+    def end(self) -> None:
+        self.frames.append(
+            (
+                self.start,
+                self.last - self.start,
+                *self.current.values(),
+                self.calls,
+                self.vertices,
+            )
+        )
+
+    @property
+    def fields(self) -> tuple:
+        return ("time", "total", *self.phases, "calls", "vertices")
+
+    def summary(self) -> dict:
+        # mean values over the kept history, times in milliseconds
+        if not self.frames:
+            return {}
+
+        columns = list(zip(*self.frames))
+        result = {
+            field: sum(column) / len(column) * 1000
+            for field, column in zip(self.fields[1:-2], columns[1:-2])
+        }
+        result["calls"] = sum(columns[-2]) / len(self.frames)
+        result["vertices"] = sum(columns[-1]) / len(self.frames)
+
+        # frames render on demand, so the rate comes from how long frames take
+        # rather than how often they were drawn
+        result["fps"] = 1000 / result["total"] if result["total"] else 0
+        return result
+
+    def text(self) -> str:
+        summary = self.summary()
+        if not summary:
+            return ""
+
+        lines = [f"{summary['fps']:.0f} fps  {summary['total']:.2f} ms"]
+        lines += [f"{phase:<9}{summary[phase]:.2f} ms" for phase in self.phases]
+        lines.append(
+            f"{summary['calls']:.0f} calls  {summary['vertices']:.0f} vertices"
+        )
+        return "\n".join(lines)
+
+    def write_csv(self, fp, label: str = None, header: bool = True) -> None:
+        writer = csv.writer(fp)
+        if header:
+            writer.writerow(("label",) * (label is not None) + self.fields)
+
+        for frame in self.frames:
+            writer.writerow((label,) * (label is not None) + frame)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import pathlib
+import weakref
+
+import numpy
+import PIL.Image
+
+STORE_PATH = "store"
+
+
+class Store:
+    def __init__(self, root: str = STORE_PATH) -> None:
+        self.root = pathlib.Path(root)
+
+        # one decoded buffer per unique texture for as long as anything holds it,
+        # buffers are read only so holders copy before writing
+        self.buffers = weakref.WeakValueDictionary()
+
+        # owners keeping each texture on disk, persistent ones (instances and
+        # profiles) are saved while others such as editor tabs last a session
+        self.refs = {}
+        self.persistent = {}
+        self.load_refs()
+
+    @staticmethod
+    def key(pixels: numpy.ndarray) -> str:
+        # identical pixels share a key however the file was encoded
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(numpy.array(pixels.shape, numpy.int32).tobytes())
+        digest.update(numpy.ascontiguousarray(pixels).data)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> pathlib.Path:
+        return self.root / key[:2] / f"{key}.png"
+
+    def put(self, img: PIL.Image.Image | numpy.ndarray) -> tuple:
+        # img is a PIL image, closed once decoded, or an rgba pixel array,
+        # returns the key and the shared read only buffer
+        if isinstance(img, PIL.Image.Image):
+            try:
+                pixels = numpy.array(img.convert("RGBA"), numpy.uint8)
+
+            finally:
+                img.close()
+
+        else:
+            pixels = numpy.array(img, numpy.uint8)
+
+        key = self.key(pixels)
+        if key in self.buffers:
+            return key, self.buffers[key]
+
+        path = self.path(key)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            PIL.Image.fromarray(pixels, "RGBA").save(tmp, "png")
+            os.replace(tmp, path)
+
+        pixels.flags.writeable = False
+        self.buffers[key] = pixels
+        return key, pixels
+
+    def get(self, key: str) -> numpy.ndarray:
+        pixels = self.buffers.get(key)
+        if pixels is None:
+            with PIL.Image.open(self.path(key)) as img:
+                pixels = numpy.array(img.convert("RGBA"), numpy.uint8)
+
+            pixels.flags.writeable = False
+            self.buffers[key] = pixels
+
+        return pixels
+
+    def acquire(self, key: str, owner: object, persistent: bool = False) -> None:
+        if persistent:
+            self.persistent.setdefault(key, set()).add(owner)
+            self.save_refs()
+
+        else:
+            self.refs.setdefault(key, set()).add(owner)
+
+    def release(self, key: str, owner: object) -> None:
+        owners = self.refs.get(key, set())
+        owners.discard(owner)
+        if not owners:
+            self.refs.pop(key, None)
+
+        if owner in self.persistent.get(key, ()):
+            self.persistent[key].discard(owner)
+            if not self.persistent[key]:
+                del self.persistent[key]
+
+            self.save_refs()
+
+    def release_all(self, owner: object) -> None:
+        for key in [k for k, v in self.refs.items() if owner in v]:
+            self.release(key, owner)
+
+        for key in [k for k, v in self.persistent.items() if owner in v]:
+            self.release(key, owner)
+
+    def owners(self, key: str) -> set:
+        return self.refs.get(key, set()) | self.persistent.get(key, set())
+
+    def collect(self) -> int:
+        # delete files nothing refers to, returns how many were removed
+        removed = 0
+        for path in self.root.glob("*/*.png"):
+            key = path.stem
+            if key not in self.refs and key not in self.persistent:
+                self.buffers.pop(key, None)
+                path.unlink()
+                removed += 1
+
+        return removed
+
+    def load_refs(self) -> None:
+        try:
+            with open(self.root / "refs.json", "r") as fp:
+                self.persistent = {
+                    key: set(owners) for key, owners in json.load(fp).items()
+                }
+
+        except (OSError, ValueError):
+            self.persistent = {}
+
+    def save_refs(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / "refs.json.tmp"
+        with open(tmp, "w") as fp:
+            json.dump({k: sorted(v) for k, v in self.persistent.items()}, fp)
+
+        os.replace(tmp, self.root / "refs.json")
+
+
+STORES = {}
+
+
+def get_store(root: str = STORE_PATH) -> Store:
+    # shared by every part of the launcher using the same directory
+    if root not in STORES:
+        STORES[root] = Store(root)
+
+    return STORES[root]
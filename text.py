@@ -2,6 +2,48 @@ import ctypes
 import glob
 import tkinter
 
+# § codes setting the colour tag
+COLORS = {
+    "0": "black",
+    "1": "dark_blue",
+    "2": "dark_green",
+    "3": "dark_aqua",
+    "4": "dark_red",
+    "5": "dark_purple",
+    "6": "gold",
+    "7": "gray",
+    "8": "dark_gray",
+    "9": "blue",
+    "a": "green",
+    "b": "aqua",
+    "c": "red",
+    "d": "light_purple",
+    "e": "yellow",
+    "f": "white",
+    "g": "minecoin_gold",
+    "h": "material_quartz",
+    "i": "material_iron",
+    "j": "material_netherite",
+    "m": "material_redstone",
+    "n": "material_copper",
+    "p": "material_gold",
+    "q": "material_emerald",
+    "s": "material_diamond",
+    "t": "material_lapis",
+    "u": "material_amethyst",
+}
+
+# obfuscated, bold, italic and reset
+FORMATS = "klor"
+
+# font tag by (bold, italic)
+STYLES = {
+    (False, False): "normal",
+    (True, False): "bold",
+    (False, True): "italic",
+    (True, True): "bold italic",
+}
+
 
 class Text:
     @staticmethod
@@ -55,165 +97,53 @@ class Text:
         return output
 
     @staticmethod
-    def parse(text: str) -> tuple:
-        emitted = ()
+    def iter_parse(text: str):
+        # yields the (segment, tags) pairs parse returns one at a time, text
+        # between codes is sliced out instead of built up a character at once
         color = ""
         bold = False
         italic = False
         current = ()
-        segment = ""
-        skip = 0
-        for i, char in enumerate(text):
-            if skip:
-                skip -= 1
+        start = 0
+        end = len(text) - 1
+        i = text.find("§")
+        while 0 <= i < end:
+            code = text[i + 1]
+            if code not in COLORS and code not in FORMATS:
+                # unknown codes are left in the text
+                i = text.find("§", i + 1)
                 continue
 
-            if char == "§" and i < len(text) - 1:
-                skip = 1
-                if segment:
-                    if bold and italic:
-                        config = ("bold italic",)
-
-                    elif bold:
-                        config = ("bold",)
-
-                    elif italic:
-                        config = ("italic",)
-
-                    else:
-                        config = ("normal",)
-
-                    if color:
-                        emitted += ((segment, current + config + (color,)),)
-
-                    else:
-                        emitted += ((segment, current + config),)
-
-                prev_segment = segment
-                segment = ""
-                match text[i + 1]:
-                    case "0":
-                        color = "black"
-
-                    case "1":
-                        color = "dark_blue"
-
-                    case "2":
-                        color = "dark_green"
-
-                    case "3":
-                        color = "dark_aqua"
-
-                    case "4":
-                        color = "dark_red"
-
-                    case "5":
-                        color = "dark_purple"
-
-                    case "6":
-                        color = "gold"
-
-                    case "7":
-                        color = "gray"
-
-                    case "8":
-                        color = "dark_gray"
-
-                    case "9":
-                        color = "blue"
-
-                    case "a":
-                        color = "green"
-
-                    case "b":
-                        color = "aqua"
-
-                    case "c":
-                        color = "red"
-
-                    case "d":
-                        color = "light_purple"
-
-                    case "e":
-                        color = "yellow"
+            if i > start:
+                tags = current + (STYLES[bold, italic],)
+                yield text[start:i], tags + (color,) if color else tags
 
-                    case "f":
-                        color = "white"
+            if code in COLORS:
+                color = COLORS[code]
 
-                    case "g":
-                        color = "minecoin_gold"
+            elif code == "k":
+                # currently unsupported
+                current += ("obfuscated",)
 
-                    case "h":
-                        color = "material_quartz"
+            elif code == "l":
+                bold = True
 
-                    case "i":
-                        color = "material_iron"
-
-                    case "j":
-                        color = "material_netherite"
-
-                    case "k":
-                        # currently unsupported
-                        current += ("obfuscated",)
-
-                    case "l":
-                        bold = True
-
-                    case "m":
-                        color = "material_redstone"
-
-                    case "n":
-                        color = "material_copper"
-
-                    case "o":
-                        italic = True
-
-                    case "p":
-                        color = "material_gold"
-
-                    case "q":
-                        color = "material_emerald"
-
-                    case "r":
-                        current = ()
-                        bold = False
-                        italic = False
-                        color = ""
-
-                    case "s":
-                        color = "material_diamond"
-
-                    case "t":
-                        color = "material_lapis"
-
-                    case "u":
-                        color = "material_amethyst"
-
-                    case _:
-                        segment = prev_segment + char
-                        emitted = emitted[:-1]
-                        skip = 0
-
-            else:
-                segment += char
-
-        if segment:
-            if bold and italic:
-                config = ("bold italic",)
-
-            elif bold:
-                config = ("bold",)
-
-            elif italic:
-                config = ("italic",)
+            elif code == "o":
+                italic = True
 
             else:
-                config = ("normal",)
+                current = ()
+                bold = False
+                italic = False
+                color = ""
 
-            if color:
-                emitted += ((segment, current + config + (color,)),)
+            start = i + 2
+            i = text.find("§", start)
 
-            else:
-                emitted += ((segment, current + config),)
+        if start < len(text):
+            tags = current + (STYLES[bold, italic],)
+            yield text[start:], tags + (color,) if color else tags
 
-        return emitted
+    @staticmethod
+    def parse(text: str) -> tuple:
+        return tuple(Text.iter_parse(text))
@@ -0,0 +1,72 @@
+import functools
+import math
+
+import numpy
+
+# (x, y, width, height, dx, dy) regions of the 64x32 layout copied mirrored by
+# (dx, dy) into the left leg and arm slots the 64x64 layout added
+LEGACY_COPIES = (
+    (4, 16, 4, 4, 16, 32),
+    (8, 16, 4, 4, 16, 32),
+    (0, 20, 4, 12, 24, 32),
+    (4, 20, 4, 12, 16, 32),
+    (8, 20, 4, 12, 8, 32),
+    (12, 20, 4, 12, 16, 32),
+    (44, 16, 4, 4, -8, 32),
+    (48, 16, 4, 4, -8, 32),
+    (40, 20, 4, 12, 0, 32),
+    (44, 20, 4, 12, -8, 32),
+    (48, 20, 4, 12, -16, 32),
+    (52, 20, 4, 12, -8, 32),
+)
+
+
+def is_legacy(pixels: numpy.ndarray) -> bool:
+    # (..., height, width, 4) with the old half height layout
+    height, width = pixels.shape[-3:-1]
+    return width == 2 * height
+
+
+@functools.cache
+def legacy_map(scale: int) -> tuple:
+    # source rows and columns for every copied texel of the new bottom half
+    size = 64 * scale
+    rows = numpy.full((size, size), -1)
+    cols = numpy.full((size, size), -1)
+    for x, y, width, height, dx, dy in LEGACY_COPIES:
+        src_rows = y * scale + numpy.arange(height * scale)
+        src_cols = x * scale + numpy.arange(width * scale)[::-1]
+        dst_rows = (y + dy) * scale + numpy.arange(height * scale)
+        dst_cols = (x + dx) * scale + numpy.arange(width * scale)
+        rows[numpy.ix_(dst_rows, dst_cols)] = src_rows[:, None]
+        cols[numpy.ix_(dst_rows, dst_cols)] = src_cols[None, :]
+
+    mask = rows >= 0
+    return numpy.nonzero(mask), rows[mask], cols[mask]
+
+
+def convert_legacy(pixels: numpy.ndarray) -> numpy.ndarray:
+    # 64x32 skins (or hd multiples) to the 64x64 layout, any leading axes are
+    # treated as a batch so many skins convert in one call
+    if not is_legacy(pixels):
+        return pixels
+
+    height, width = pixels.shape[-3:-1]
+    (dst_rows, dst_cols), src_rows, src_cols = legacy_map(width // 64)
+    result = numpy.zeros(pixels.shape[:-3] + (width, width, 4), pixels.dtype)
+    result[..., :height, :, :] = pixels
+    result[..., dst_rows, dst_cols, :] = pixels[..., src_rows, src_cols, :]
+    return result
+
+
+def pad_cape(pixels: numpy.ndarray) -> numpy.ndarray:
+    # capes are sampled as a 64x32 layout, smaller legacy capes such as 22x17
+    # are placed in the top left of the smallest layout that fits them
+    height, width = pixels.shape[-3:-1]
+    if width == 2 * height and width % 64 == 0:
+        return pixels
+
+    scale = max(1, math.ceil(width / 64), math.ceil(height / 32))
+    result = numpy.zeros(pixels.shape[:-3] + (32 * scale, 64 * scale, 4), pixels.dtype)
+    result[..., :height, :width, :] = pixels
+    return result
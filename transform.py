@@ -0,0 +1,58 @@
+import math
+
+import numpy
+
+# camera angles giving a true isometric view of the model
+ISOMETRIC_ROT_X = 35.264
+ISOMETRIC_ROT_Y = -45
+
+
+def translate(x: float, y: float, z: float) -> numpy.ndarray:
+    matrix = numpy.identity(4, numpy.float32)
+    matrix[:3, 3] = x, y, z
+    return matrix
+
+
+def scale(x: float, y: float, z: float) -> numpy.ndarray:
+    return numpy.diag(numpy.array([x, y, z, 1], numpy.float32))
+
+
+def rotate(angle: float, x: float, y: float, z: float) -> numpy.ndarray:
+    # same convention as glRotatef, angle in degrees around a unit axis
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    matrix = numpy.identity(4, numpy.float32)
+    matrix[:3, :3] = (
+        c * numpy.identity(3)
+        + s * numpy.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+        + (1 - c) * numpy.outer((x, y, z), (x, y, z))
+    )
+    return matrix
+
+
+def perspective(fovy: float, aspect: float, near: float, far: float) -> numpy.ndarray:
+    # same matrix as gluPerspective
+    f = 1 / math.tan(math.radians(fovy) / 2)
+    matrix = numpy.zeros((4, 4), numpy.float32)
+    matrix[0, 0] = f / aspect
+    matrix[1, 1] = f
+    matrix[2, 2] = (far + near) / (near - far)
+    matrix[2, 3] = 2 * far * near / (near - far)
+    matrix[3, 2] = -1
+    return matrix
+
+
+def ortho(
+    left: float, right: float, bottom: float, top: float, near: float, far: float
+) -> numpy.ndarray:
+    # same matrix as glOrtho
+    matrix = numpy.identity(4, numpy.float32)
+    matrix[0, 0] = 2 / (right - left)
+    matrix[1, 1] = 2 / (top - bottom)
+    matrix[2, 2] = -2 / (far - near)
+    matrix[:3, 3] = (
+        -(right + left) / (right - left),
+        -(top + bottom) / (top - bottom),
+        -(far + near) / (far - near),
+    )
+    return matrix
@@ -0,0 +1,400 @@
+import ctypes
+import tkinter
+
+import model
+import skin
+import texture
+import transform
+
+import numpy
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+import PIL.Image
+
+VERTEX_SHADER = """
+#version 330 core
+
+layout(location = 0) in vec3 position;
+layout(location = 1) in vec2 uv;
+layout(location = 2) in vec4 pivot;
+layout(location = 3) in vec4 placement;
+layout(location = 4) in vec2 pose;
+layout(location = 5) in float layer;
+
+uniform mat4 projection;
+uniform float scale;
+
+out vec3 texcoord;
+flat out int overlay;
+
+mat3 rotate_x(float angle) {
+    float c = cos(radians(angle));
+    float s = sin(radians(angle));
+    return mat3(1, 0, 0, 0, c, s, 0, -s, c);
+}
+
+mat3 rotate_y(float angle) {
+    float c = cos(radians(angle));
+    float s = sin(radians(angle));
+    return mat3(c, 0, -s, 0, 1, 0, s, 0, c);
+}
+
+void main() {
+    // swing limbs around their pivot, then orbit the model around its centre
+    vec3 p = pivot.xyz + rotate_x(pose.y * pivot.w) * (position - pivot.xyz);
+    p = rotate_x(pose.x) * rotate_y(placement.z) * (p - vec3(0, 16, 0));
+    gl_Position = projection * vec4(placement.xy + vec2(p.x, -p.y) * scale, p.z * scale, 1);
+    texcoord = vec3(uv, placement.w);
+    overlay = int(layer);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330 core
+
+uniform sampler2DArray skins;
+
+in vec3 texcoord;
+flat in int overlay;
+out vec4 color;
+
+void main() {
+    // the base layer is opaque like SkinView's, overlays are alpha tested
+    color = texture(skins, texcoord);
+    if (overlay == 0) {
+        color.a = 1;
+    } else if (color.a == 0) {
+        discard;
+    }
+}
+"""
+
+# direction each limb swings in when posed
+SWING = {
+    "right-sleeve": 1,
+    "left-sleeve": -1,
+    "right-pants": -1,
+    "left-pants": 1,
+}
+
+# model units fitted into each cell
+MODEL_HEIGHT = 40
+
+
+def build_mesh() -> tuple:
+    # both player models in one buffer, base layers before their overlays
+    meshes = []
+    ranges = {}
+    first = 0
+    for slim in (False, True):
+        parts = model.get_model(slim)
+        count = 0
+        for layer, boxes in enumerate((parts.base, parts.overlays)):
+            for name, box in boxes.items():
+                triangles = model.triangulate(box.array)
+                mesh = numpy.empty((len(triangles), 10), numpy.float32)
+                mesh[:, :3] = (triangles[:, 2:] @ box.matrix(False).T)[:, :3]
+                mesh[:, 3:5] = triangles[:, :2]
+                mesh[:, 5:8] = box.piv_x, box.piv_y, box.piv_z
+                mesh[:, 8] = SWING.get(name, 0)
+                mesh[:, 9] = layer
+                meshes.append(mesh)
+                count += len(mesh)
+
+        ranges[slim] = (first, count)
+        first += count
+
+    return numpy.concatenate(meshes), ranges
+
+
+class Wardrobe(skin.OnDemandFrame):
+    def __init__(
+        self, *args, cell_size: int = 160, background_color: tuple = None, **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.cell_size = cell_size
+        self.background_color = background_color
+        self.scroll_y = 0
+
+        # yaw, pitch and limb swing plus a texture array layer per entry
+        self.slim = numpy.zeros(0, bool)
+        self.poses = numpy.zeros((0, 3), numpy.float32)
+        self.pixels = numpy.zeros((0, 64, 64, 4), numpy.uint8)
+        self.count = 0
+
+        # entries are split over texture arrays of at most max_layers layers,
+        # each batch is [texture, capacity, uploaded]
+        self.batches = []
+        self.max_layers = 1
+
+        self.program = None
+        self.prev = [0, 0]
+
+        self.bind("<MouseWheel>", self.scroll)
+        self.bind("<Button-1>", self.set_pos)
+        self.bind("<B1-Motion>", self.drag)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(
+        self,
+        skin_img: PIL.Image.Image,
+        slim: bool,
+        rot_x: float = transform.ISOMETRIC_ROT_X,
+        rot_y: float = transform.ISOMETRIC_ROT_Y,
+    ) -> int:
+        try:
+            skin_img = skin_img.convert("RGBA")
+            if skin_img.width != 64:
+                # every layer of the texture arrays shares one size, so hd
+                # skins are shown downscaled to 64 wide
+                skin_img = skin_img.resize(
+                    (64, 64 * skin_img.height // skin_img.width),
+                    PIL.Image.Resampling.NEAREST,
+                )
+
+            pixels = texture.convert_legacy(numpy.asarray(skin_img, numpy.uint8))
+
+        finally:
+            skin_img.close()
+
+        if self.count == len(self.pixels):
+            size = max(16, 2 * len(self.pixels))
+            self.pixels = numpy.resize(self.pixels, (size, 64, 64, 4))
+            self.poses = numpy.resize(self.poses, (size, 3))
+            self.slim = numpy.resize(self.slim, size)
+
+        index = self.count
+        self.pixels[index] = pixels
+        self.poses[index] = rot_y, rot_x, 0
+        self.slim[index] = slim
+        self.count += 1
+        self.mark_dirty()
+        return index
+
+    def set_pose(
+        self,
+        index: int,
+        rot_x: float = None,
+        rot_y: float = None,
+        swing: float = None,
+    ) -> None:
+        for column, value in enumerate((rot_y, rot_x, swing)):
+            if value is not None:
+                self.poses[index, column] = value
+
+        self.mark_dirty()
+
+    def clear(self) -> None:
+        self.count = 0
+        for batch in self.batches:
+            batch[2] = 0
+
+        self.scroll_y = 0
+        self.mark_dirty()
+
+    @property
+    def columns(self) -> int:
+        return max(1, self.width // self.cell_size)
+
+    def index_at(self, x: int, y: int) -> int:
+        column = x // self.cell_size
+        index = (y + self.scroll_y) // self.cell_size * self.columns + column
+        if column < self.columns and 0 <= index < self.count:
+            return int(index)
+
+        return None
+
+    def scroll(self, event: tkinter.Event) -> None:
+        rows = -(-self.count // self.columns)
+        limit = max(0, rows * self.cell_size - self.height)
+        self.scroll_y -= event.delta / 120 * self.cell_size / 2
+        self.scroll_y = int(min(limit, max(0, self.scroll_y)))
+        self.mark_dirty()
+
+    def set_pos(self, event: tkinter.Event) -> None:
+        self.prev = [event.x, event.y]
+
+    def drag(self, event: tkinter.Event) -> None:
+        # spin the entry under the cursor
+        index = self.index_at(*self.prev)
+        if index is not None:
+            self.poses[index, 0] += (event.x - self.prev[0]) * 0.4
+            self.mark_dirty()
+
+        self.prev = [event.x, event.y]
+
+    def initgl(self) -> None:
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        if self.program is not None:
+            return
+
+        self.max_layers = int(glGetIntegerv(GL_MAX_ARRAY_TEXTURE_LAYERS))
+        self.program = shaders.compileProgram(
+            shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+        )
+
+        mesh, self.ranges = build_mesh()
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+
+        self.mesh_buffer = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_buffer)
+        glBufferData(GL_ARRAY_BUFFER, mesh.nbytes, mesh, GL_STATIC_DRAW)
+        for location, size, offset in ((0, 3, 0), (1, 2, 12), (2, 4, 20), (5, 1, 36)):
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(
+                location, size, GL_FLOAT, GL_FALSE, 40, ctypes.c_void_p(offset)
+            )
+
+        self.instance_buffer = glGenBuffers(1)
+        for location in (3, 4):
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+
+        glBindVertexArray(0)
+
+    def upload_skins(self) -> None:
+        while len(self.batches) * self.max_layers < self.count:
+            self.batches.append([glGenTextures(1), 0, 0])
+
+        for index, batch in enumerate(self.batches):
+            texture, capacity, uploaded = batch
+            first = index * self.max_layers
+            count = min(self.count - first, self.max_layers)
+            if count <= uploaded:
+                continue
+
+            glBindTexture(GL_TEXTURE_2D_ARRAY, texture)
+            if count > capacity:
+                # grow the array and re-send every layer
+                capacity = min(len(self.pixels) - first, self.max_layers)
+                uploaded = 0
+                glTexImage3D(
+                    GL_TEXTURE_2D_ARRAY,
+                    0,
+                    GL_RGBA8,
+                    64,
+                    64,
+                    capacity,
+                    0,
+                    GL_RGBA,
+                    GL_UNSIGNED_BYTE,
+                    None,
+                )
+                glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+                glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+                glTexParameteri(
+                    GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE
+                )
+                glTexParameteri(
+                    GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE
+                )
+
+            glTexSubImage3D(
+                GL_TEXTURE_2D_ARRAY,
+                0,
+                0,
+                0,
+                uploaded,
+                64,
+                64,
+                count - uploaded,
+                GL_RGBA,
+                GL_UNSIGNED_BYTE,
+                numpy.ascontiguousarray(self.pixels[first + uploaded : first + count]),
+            )
+            batch[1:] = capacity, count
+
+    def redraw(self) -> None:
+        super().redraw()
+        glViewport(0, 0, self.width, self.height)
+
+        if self.background_color is None:
+            glClearColor(1, 1, 1, 0)
+
+        else:
+            glClearColor(*self.background_color, 0)
+
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        if not self.count:
+            return
+
+        self.upload_skins()
+
+        # only entries in the visible rows are drawn
+        columns = self.columns
+        first = self.scroll_y // self.cell_size * columns
+        last = min(
+            self.count, -(-(self.scroll_y + self.height) // self.cell_size) * columns
+        )
+        index = numpy.arange(first, last)
+        if not len(index):
+            return
+
+        instances = numpy.empty((len(index), 6), numpy.float32)
+        instances[:, 0] = (index % columns + 0.5) * self.cell_size
+        instances[:, 1] = (index // columns + 0.5) * self.cell_size - self.scroll_y
+        instances[:, 2] = self.poses[index, 0]
+        instances[:, 3] = index % self.max_layers
+        instances[:, 4:] = self.poses[index, 1:]
+
+        # group by texture array and arm width so each group is a single
+        # instanced draw
+        batch = index // self.max_layers
+        slim = self.slim[index]
+        order = numpy.lexsort((slim, batch))
+        instances = instances[order]
+        keys = batch[order] * 2 + slim[order]
+        starts = numpy.flatnonzero(numpy.diff(keys, prepend=-1))
+        counts = numpy.diff(numpy.append(starts, len(keys)))
+
+        glUseProgram(self.program)
+        glUniformMatrix4fv(
+            glGetUniformLocation(self.program, "projection"),
+            1,
+            GL_TRUE,
+            transform.ortho(0, self.width, self.height, 0, -1000, 1000),
+        )
+        glUniform1f(
+            glGetUniformLocation(self.program, "scale"),
+            self.cell_size / MODEL_HEIGHT,
+        )
+        glUniform1i(glGetUniformLocation(self.program, "skins"), 0)
+        glActiveTexture(GL_TEXTURE0)
+
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_buffer)
+        glBufferData(GL_ARRAY_BUFFER, instances.nbytes, instances, GL_STREAM_DRAW)
+        for offset, count in zip(starts.tolist(), counts.tolist()):
+            glBindTexture(GL_TEXTURE_2D_ARRAY, self.batches[keys[offset] // 2][0])
+            glVertexAttribPointer(
+                3, 4, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset * 24)
+            )
+            glVertexAttribPointer(
+                4, 2, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset * 24 + 16)
+            )
+            glDrawArraysInstanced(
+                GL_TRIANGLES, *self.ranges[bool(keys[offset] % 2)], count
+            )
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+        glUseProgram(0)
+
+    def destroy(self) -> None:
+        if self.program is not None and self.winfo_ismapped():
+            self.tkMakeCurrent()
+            if self.batches:
+                glDeleteTextures([texture for texture, _, _ in self.batches])
+
+            glDeleteBuffers(2, [self.mesh_buffer, self.instance_buffer])
+            glDeleteVertexArrays(1, [self.vao])
+            glDeleteProgram(self.program)
+
+        super().destroy()